@@ -0,0 +1,126 @@
+# amp.py
+"""Speculative AMP fetches for pages that are likely to come out thin.
+
+The AMP fallback normally starts only after local extraction has failed,
+a second round-trip on exactly the slowest pages. For pages predicted to
+be thin, ``AmpSpeculator.start()`` requests the AMP version as soon as the
+page's ``<link rel="amphtml">`` is seen in its ``<head>``, while the parser
+pool works on the page itself. If extraction reaches ``MIN_BODY_CHARS``
+after all, the AMP download is cancelled (mid-stream if already running).
+
+A page is predicted thin when its URL matches the source's
+``amp_patterns`` (e.g. ``/sport/``, ``/live/``) or when most recent pages
+under the same section (host + first two directories) needed AMP; those
+per-section counts are learned as pages are scraped and kept in
+``state/amp_stats.json``.
+"""
+import os, re, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from fetcher import HTML_TYPES, page_body
+
+DEFAULT_PATH    = "state/amp_stats.json"
+HEAD_BYTES      = 64 * 1024     # how far into the page to look for <link rel="amphtml">
+MIN_SAMPLES     = 5             # pages seen in a section before its rate is trusted
+SPECULATE_RATE  = 0.5           # share of a section's pages that needed AMP
+STATS_DECAY     = 0.95          # older observations fade so sections can change
+
+_AMP_LINK_RE = re.compile(r"""<link\b[^>]*\brel\s*=\s*["']?amphtml\b[^>]*>""", re.I)
+_HREF_RE     = re.compile(r"""\bhref\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+def amphtml_link(html, base_url):
+    """AMP URL declared in the first ``HEAD_BYTES`` of ``html`` (str or bytes), or None."""
+    head = html[:HEAD_BYTES]
+    if isinstance(head, bytes):
+        head = head.decode("latin-1")
+    head = head.split("</head>", 1)[0]
+    m = _AMP_LINK_RE.search(head)
+    href = _HREF_RE.search(m.group(0)) if m else None
+    return urljoin(base_url, href.group(1)) if href else None
+
+def section(url):
+    p = urlparse(url)
+    parts = [s for s in p.path.split("/") if s][:-1][:2]     # directories, not the slug
+    return "/".join([p.netloc.lower(), *parts])
+
+class Speculation:
+    """An AMP download in flight that can be cancelled."""
+
+    def __init__(self, url, future, cancel):
+        self.url = url
+        self.future = future
+        self._cancel = cancel
+
+    def result(self):
+        return self.future.result()
+
+    def cancel(self):
+        self._cancel.set()
+        self.future.cancel()
+
+class AmpSpeculator:
+    def __init__(self, workers, path=DEFAULT_PATH):
+        self.path = path
+        self.pool = ThreadPoolExecutor(workers)
+        self.lock = threading.Lock()
+        self.stats = {}                 # section -> [pages, needed_amp] (decayed counts)
+        self.counts = {"started": 0, "used": 0, "cancelled": 0}
+        try:
+            with open(path) as f:
+                self.stats = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def likely_thin(self, src, url):
+        if any(p in url for p in src.amp_patterns):
+            return True
+        with self.lock:
+            pages, needed = self.stats.get(section(url), (0, 0))
+        return pages >= MIN_SAMPLES and needed / pages >= SPECULATE_RATE
+
+    def start(self, fetcher, src, url, html):
+        """Start fetching the page's AMP version if it is likely needed; returns a Speculation or None."""
+        amp_url = amphtml_link(html, url)
+        if not amp_url or not self.likely_thin(src, url):
+            return None
+        cancel = threading.Event()
+        fut = self.pool.submit(lambda: page_body(fetcher.get(
+            amp_url, src.user_agent, src.pause_seconds, src.max_page_bytes, HTML_TYPES, cancel=cancel)))
+        self._count("started")
+        return Speculation(amp_url, fut, cancel)
+
+    def finish(self, spec, used):
+        if spec is None:
+            return
+        if used:
+            self._count("used")
+        else:
+            spec.cancel()
+            self._count("cancelled")
+
+    def observe(self, url, needed_amp):
+        """Learn whether a page that has an AMP version needed it."""
+        key = section(url)
+        with self.lock:
+            pages, needed = self.stats.get(key, (0, 0))
+            self.stats[key] = [pages * STATS_DECAY + 1, needed * STATS_DECAY + bool(needed_amp)]
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def summary(self):
+        c = self.counts
+        return f"{c['started']} speculative AMP fetches, {c['used']} used, {c['cancelled']} cancelled"
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.lock:
+            data = json.dumps({k: [round(v, 3) for v in s] for k, s in self.stats.items()})
+        with open(self.path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(self.path + ".tmp", self.path)
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
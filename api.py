@@ -0,0 +1,255 @@
+# api.py
+"""Library API: scrape articles as a stream, without going through the CSVs.
+
+    from sources import load_sources
+    from api import articles, CsvDedupe, JsonlSink
+
+    for row in articles(load_sources("sources", ["bbc"])):
+        handle(row)                      # a CSV row dict, "content" included
+
+    async for row in aarticles(sources, dedupe=MemoryDedupe()):
+        await handle(row)
+
+Each row is yielded as soon as it is extracted; the feeds' links are
+fetched by ``fetch_workers`` threads and parsed in the parser pool, exactly
+as ``engine.py run`` does. At most ``buffer`` extracted rows wait for the
+consumer (workers block when it falls behind), the dedupe stores below are
+bounded or disk-backed, so memory does not grow with the run.
+
+Dedupe stores decide what is new, per source output (``known()`` before a
+download, ``add()`` after extraction):
+
+    MemoryDedupe(max_items)     # this process only, least recently seen ids dropped
+    CsvDedupe()                 # ids already in each source's output CSV
+    NearDupDedupe(inner, path)  # also drop near-duplicate bodies (neardup.py index)
+
+Sinks get every yielded row (``write(src, row)``, then ``close()``):
+``CsvSink`` appends to each source's output CSV like the engine does,
+``JsonlSink`` writes NDJSON, ``CallbackSink(fn)`` calls ``fn(src, row)``.
+Stopping the iteration early (``break``) stops the workers and closes the sinks.
+"""
+import json, queue, asyncio, threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import (read_feed, scrape_link, FETCH_WORKERS, PARSE_WORKERS,
+                    BODY_STORE_DIR, SEEN_DIR, NEARDUP_DB, NEARDUP_THRESHOLD)
+from extract import article_id
+from parsepool import ParserPool
+from fetcher import Fetcher
+from bodystore import BodyStore
+from storage import ensure_csv, append_rows, locked
+from seenset import load_seen
+from neardup import NearDupIndex
+
+BUFFER_SIZE  = 64          # extracted rows waiting for the consumer before workers block
+MEMORY_ITEMS = 100_000     # ids a MemoryDedupe remembers
+SINK_BATCH   = 100         # rows a CsvSink buffers per output before appending
+
+_DONE = object()
+
+# ===================== DEDUPE STORES =====================
+class MemoryDedupe:
+    """Ids seen by this process, the ``max_items`` most recent ones."""
+
+    def __init__(self, max_items=MEMORY_ITEMS):
+        self.max_items = max_items
+        self.ids = OrderedDict()
+        self.lock = threading.Lock()
+
+    def known(self, src, id_article):
+        with self.lock:
+            return (src.output_csv, id_article) in self.ids
+
+    def add(self, src, row):
+        key = (src.output_csv, row["id_article"])
+        with self.lock:
+            if key in self.ids:
+                self.ids.move_to_end(key)
+                return False
+            self.ids[key] = None
+            if len(self.ids) > self.max_items:
+                self.ids.popitem(last=False)
+            return True
+
+class CsvDedupe:
+    """Ids already stored in each source's output CSV (memory-mapped seen sets) plus this run's."""
+
+    def __init__(self, seen_dir=SEEN_DIR):
+        self.seen_dir = seen_dir
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def _seen(self, src):
+        if src.output_csv not in self.seen:
+            self.seen[src.output_csv] = load_seen(src.output_csv, "id_article", self.seen_dir)
+        return self.seen[src.output_csv]
+
+    def known(self, src, id_article):
+        with self.lock:
+            return id_article in self._seen(src)
+
+    def add(self, src, row):
+        with self.lock:
+            seen = self._seen(src)
+            if row["id_article"] in seen:
+                return False
+            seen.add(row["id_article"])
+            return True
+
+class NearDupDedupe:
+    """``inner``, plus near-duplicate bodies (MinHash/LSH index in SQLite, per output)."""
+
+    def __init__(self, inner=None, path=NEARDUP_DB, threshold=NEARDUP_THRESHOLD):
+        self.inner = inner if inner is not None else MemoryDedupe()
+        self.index = NearDupIndex(path, threshold=threshold)
+
+    def known(self, src, id_article):
+        return self.inner.known(src, id_article)
+
+    def add(self, src, row):
+        sig = self.index.signature(row["content"])
+        if self.index.query(sig, src.output_csv) or not self.inner.add(src, row):
+            return False
+        self.index.add(row["id_article"], sig, src.output_csv)
+        return True
+
+# ===================== SINKS =====================
+class CsvSink:
+    """Append rows to each source's ``output_csv`` (bodies in the body store), ``batch`` at a time."""
+
+    def __init__(self, store_dir=BODY_STORE_DIR, batch=SINK_BATCH):
+        self.store = BodyStore(store_dir)
+        self.batch = batch
+        self.pending = defaultdict(list)
+
+    def write(self, src, row):
+        self.pending[src.output_csv].append(row)
+        if len(self.pending[src.output_csv]) >= self.batch:
+            self._flush(src.output_csv)
+
+    def _flush(self, path):
+        rows = self.pending.pop(path, [])
+        if rows:
+            with locked(path):
+                ensure_csv(path)
+                append_rows(path, rows, self.store)
+
+    def close(self):
+        for path in list(self.pending):
+            self._flush(path)
+
+class JsonlSink:
+    """One JSON object per row, appended to ``path``."""
+
+    def __init__(self, path):
+        self.f = open(path, "a", encoding="utf-8")
+
+    def write(self, src, row):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.f.close()
+
+class CallbackSink:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def write(self, src, row):
+        self.fn(src, row)
+
+    def close(self):
+        pass
+
+# ===================== STREAM =====================
+def feed_links(io, fetcher, sources):
+    """[(link, [(source, category)])] of every feed of ``sources``, newest first."""
+    feeds = [(src, category, url) for src in sources for category, url in src.feeds.items()]
+    by_url = defaultdict(list)
+    for src, category, url in feeds:
+        by_url[url].append((src, category))
+    targets, published = defaultdict(list), {}
+    futures = {url: io.submit(read_feed, fetcher, subs[0][0], subs[0][1], url) for url, subs in by_url.items()}
+    for url, fut in futures.items():
+        entries, _ = fut.result()
+        for link, stamp in entries:
+            for src, category in by_url[url]:
+                if (src, category) not in targets[link]:
+                    targets[link].append((src, category))
+            published[link] = max(published.get(link) or 0, stamp or 0)
+    return sorted(targets.items(), key=lambda kv: -published[kv[0]])
+
+def _put(out, item, stop):
+    """Block while the consumer is behind; give up once the stream is closed."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def articles(sources, dedupe=None, sinks=(), fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS,
+             buffer=BUFFER_SIZE, limit=None):
+    """Yield new article rows of ``sources`` as they are extracted (at most ``limit``)."""
+    dedupe = dedupe if dedupe is not None else MemoryDedupe()
+    fetcher = Fetcher()
+    parsers = ParserPool(parse_workers, selectors={sel for src in sources for sel in src.body_selectors})
+    io = ThreadPoolExecutor(fetch_workers)
+    out = queue.Queue(buffer)
+    stop = threading.Event()
+    try:
+        todo = iter(feed_links(io, fetcher, sources))
+        todo_lock = threading.Lock()
+
+        def worker():
+            try:
+                while not stop.is_set():
+                    with todo_lock:
+                        item = next(todo, None)
+                    if item is None:
+                        return
+                    link, targets = item
+                    if all(dedupe.known(src, article_id(link)) for src, _ in targets):
+                        continue
+                    for pair in scrape_link(fetcher, parsers, link, targets) or ():
+                        if not _put(out, pair, stop):
+                            return
+            finally:
+                _put(out, _DONE, stop)
+
+        for _ in range(fetch_workers):
+            io.submit(worker)
+        running, n = fetch_workers, 0
+        while running:
+            item = out.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            src, row = item
+            if not dedupe.add(src, row):
+                continue
+            for sink in sinks:
+                sink.write(src, row)
+            yield row
+            n += 1
+            if limit and n >= limit:
+                return
+    finally:
+        stop.set()
+        io.shutdown(cancel_futures=True)
+        parsers.shutdown()
+        for sink in sinks:
+            sink.close()
+
+async def aarticles(sources, **kw):
+    """``articles()`` as an async generator; the scraping runs in worker threads."""
+    it = articles(sources, **kw)
+    try:
+        while True:
+            row = await asyncio.to_thread(next, it, _DONE)
+            if row is _DONE:
+                return
+            yield row
+    finally:
+        await asyncio.to_thread(it.close)
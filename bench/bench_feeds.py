@@ -0,0 +1,95 @@
+# bench/bench_feeds.py
+"""Feed-parsing benchmark: the lxml fast path against feedparser on our own feeds.
+
+    python bench/bench_feeds.py                          # download every configured feed once
+    python bench/bench_feeds.py --save bench/feeds       # ... and keep them
+    python bench/bench_feeds.py --saved bench/feeds -n 50
+
+For each feed it reports both parse times (median of ``-n`` runs, capped at
+the source's max_per_feed like the engine) and whether both paths return the
+same links and dates. Exits non-zero on a mismatch.
+"""
+import os, sys, glob, time, hashlib, argparse, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sources import load_sources          # noqa: E402
+from feeds import parse_fast, parse_slow, FeedError   # noqa: E402
+
+def timed(fn, data, limit, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = fn(data, limit)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), out
+
+def configured_feeds(config_dir):
+    """{feed_url: max_per_feed} over every source."""
+    feeds = {}
+    for src in load_sources(config_dir):
+        for url in src.feeds.values():
+            feeds[url] = max(feeds.get(url, 0), src.max_per_feed)
+    return feeds
+
+def download(feeds, save=None):
+    from fetcher import Fetcher
+    fetcher, out = Fetcher(), {}
+    for url, limit in feeds.items():
+        try:
+            data = fetcher.get(url, pause=0.5).content
+        except Exception as e:
+            print(f"[skip feed] {url} -> {e}")
+            continue
+        out[url] = (data, limit)
+        if save:
+            os.makedirs(save, exist_ok=True)
+            name = hashlib.sha1(url.encode()).hexdigest()[:12] + ".xml"
+            with open(os.path.join(save, name), "wb") as f:
+                f.write(data)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--config-dir", default=os.path.join(ROOT, "sources"))
+    ap.add_argument("--saved", help="directory of saved feed files instead of downloading")
+    ap.add_argument("--save", help="keep downloaded feeds in this directory")
+    ap.add_argument("--limit", type=int, default=60, help="entries per saved feed")
+    ap.add_argument("-n", "--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.saved:
+        docs = {}
+        for path in sorted(glob.glob(os.path.join(args.saved, "*"))):
+            with open(path, "rb") as f:
+                docs[os.path.basename(path)] = (f.read(), args.limit)
+    else:
+        docs = download(configured_feeds(args.config_dir), args.save)
+
+    total_fast = total_slow = 0.0
+    mismatches = fallbacks = 0
+    for name, (data, limit) in docs.items():
+        slow_ms, (slow, _) = timed(parse_slow, data, limit, args.runs)
+        try:
+            fast_ms, (fast, _) = timed(parse_fast, data, limit, args.runs)
+        except FeedError as e:
+            fallbacks += 1
+            print(f"  fallback  {slow_ms:7.2f} ms  {name}  ({e})")
+            total_fast += slow_ms
+            total_slow += slow_ms
+            continue
+        same = [(e["link"], e["published"]) for e in fast] == [(e["link"], e["published"]) for e in slow]
+        mismatches += not same
+        total_fast += fast_ms
+        total_slow += slow_ms
+        print(f"  {fast_ms:7.2f} ms vs {slow_ms:7.2f} ms  x{slow_ms / max(fast_ms, 1e-6):5.1f}  "
+              f"{len(fast):3d} entries  {'ok' if same else 'MISMATCH'}  {name}")
+    if docs:
+        print(f"{len(docs)} feeds: fast path {total_fast:.1f} ms, feedparser {total_slow:.1f} ms "
+              f"(x{total_slow / max(total_fast, 1e-6):.1f}); {fallbacks} fallbacks, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
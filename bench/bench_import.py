@@ -0,0 +1,83 @@
+# bench/bench_import.py
+"""Startup-latency benchmark: how long a cold interpreter takes to import the engine.
+
+    python bench/bench_import.py                       # median of 10 cold starts
+    python bench/bench_import.py --top 15              # + slowest modules (-X importtime)
+    python bench/bench_import.py --record bench/import_times.csv --max-ms 400
+
+``--record`` appends one line per run (date, git rev, median) so startup
+regressions show up over time; ``--max-ms`` exits non-zero above a budget.
+It also checks that the scrape path does not pull in pandas.
+"""
+import os, sys, csv, time, argparse, statistics, subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cold_import(module, flags=()):
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, *flags, "-c", f"import {module}"],
+                       cwd=ROOT, capture_output=True, text=True)
+    if p.returncode:
+        sys.exit(p.stderr)
+    return (time.perf_counter() - t0) * 1000, p.stderr
+
+def slowest_modules(module, top):
+    _, err = cold_import(module, ("-X", "importtime"))
+    rows = []
+    for line in err.splitlines():
+        # "import time:  <self us> | <cumulative us> | <module>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = [x.strip() for x in line[len("import time:"):].split("|")]
+        rows.append((int(cum_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+def loaded_modules(module):
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    p = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return set(p.stdout.split())
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--module", default="engine")
+    ap.add_argument("-n", "--runs", type=int, default=10)
+    ap.add_argument("--top", type=int, default=0, help="show the N slowest imports")
+    ap.add_argument("--record", help="append the result to this CSV")
+    ap.add_argument("--max-ms", type=float, help="fail if the median exceeds this")
+    args = ap.parse_args()
+
+    cold_import(args.module)   # warm the OS file cache; .pyc compile
+    times = [cold_import(args.module)[0] for _ in range(args.runs)]
+    base = [cold_import("sys")[0] for _ in range(args.runs)]
+    med, floor = statistics.median(times), statistics.median(base)
+    print(f"import {args.module}: median {med:.0f} ms, min {min(times):.0f} ms "
+          f"(bare interpreter {floor:.0f} ms → {med - floor:.0f} ms of imports)")
+
+    heavy = {"pandas", "readability", "bs4", "feedparser"} & loaded_modules(args.module)
+    if heavy:
+        print(f"⚠ eager heavy imports: {', '.join(sorted(heavy))}")
+
+    for cum, own, name in slowest_modules(args.module, args.top):
+        print(f"  {cum / 1000:8.1f} ms  (self {own / 1000:6.1f})  {name}")
+
+    if args.record:
+        new = not os.path.exists(args.record)
+        with open(args.record, "a", newline="") as f:
+            w = csv.writer(f)
+            if new:
+                w.writerow(["date", "rev", "module", "median_ms", "interpreter_ms"])
+            w.writerow([datetime.now(timezone.utc).isoformat(timespec="seconds"), git_rev(),
+                        args.module, round(med, 1), round(floor, 1)])
+    if args.max_ms is not None and med > args.max_ms:
+        sys.exit(f"startup budget exceeded: {med:.0f} ms > {args.max_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
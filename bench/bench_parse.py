@@ -0,0 +1,90 @@
+# bench/bench_parse.py
+"""HTML backend benchmark: raw lxml against BeautifulSoup on saved article pages.
+
+    python bench/bench_parse.py --save bench/pages --from bbc_articles_simple.csv --count 40
+    python bench/bench_parse.py --pages bench/pages -n 5
+
+Runs ``extract()`` with both backends on every saved page, with and without
+Readability (``--selectors`` defaults to the BBC set), reports the median
+time per page and checks that both give the same result. Exits non-zero on
+any difference.
+"""
+import os, sys, csv, glob, time, hashlib, argparse, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extract import extract                 # noqa: E402
+from htmlparse import BACKENDS, compile_selectors   # noqa: E402
+from sources import DEFAULT_SELECTORS       # noqa: E402
+
+def save_pages(csv_path, directory, count):
+    """Download the last ``count`` article URLs of ``csv_path`` into ``directory``."""
+    from fetcher import Fetcher, HTML_TYPES
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        urls = [r["url"] for r in csv.DictReader(f)][-count:]
+    os.makedirs(directory, exist_ok=True)
+    fetcher = Fetcher()
+    for url in urls:
+        try:
+            body = fetcher.get(url, pause=1.0, max_bytes=4 * 2**20, types=HTML_TYPES).content
+        except Exception as e:
+            print(f"[skip fetch] {url} -> {e}")
+            continue
+        with open(os.path.join(directory, hashlib.sha1(url.encode()).hexdigest()[:12] + ".html"), "wb") as f:
+            f.write(body)
+
+def timed(html, selectors, cheap, backend, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        art = extract(html, "https://example.com/page", "bench", selectors, cheap, backend)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), art
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", default=os.path.join(ROOT, "bench", "pages"), help="directory of saved .html pages")
+    ap.add_argument("--save", help="download pages into this directory first (with --from)")
+    ap.add_argument("--from", dest="csv", help="output CSV whose latest URLs to download")
+    ap.add_argument("--count", type=int, default=40)
+    ap.add_argument("--selectors", nargs="+", default=DEFAULT_SELECTORS)
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.save:
+        if not args.csv:
+            ap.error("--save needs --from CSV")
+        save_pages(args.csv, args.save, args.count)
+        args.pages = args.save
+    paths = sorted(glob.glob(os.path.join(args.pages, "*.htm*")))
+    if not paths:
+        sys.exit(f"no pages in {args.pages}")
+    for backend in BACKENDS:
+        compile_selectors(args.selectors, backend)
+
+    mismatches = 0
+    for cheap in (False, True):
+        totals = dict.fromkeys(BACKENDS, 0.0)
+        for path in paths:
+            with open(path, "rb") as f:
+                html = f.read()
+            results = {}
+            for backend in BACKENDS:
+                ms, results[backend] = timed(html, args.selectors, cheap, backend, args.runs)
+                totals[backend] += ms
+            fast, slow = (results[b] for b in BACKENDS)
+            if fast != slow:
+                mismatches += 1
+                diff = sorted(k for k in fast if fast[k] != slow[k])
+                print(f"  MISMATCH {os.path.basename(path)} ({'cheap' if cheap else 'full'}): {', '.join(diff)}")
+        mode = "selectors + JSON-LD" if cheap else "with Readability"
+        speedup = totals["bs4"] / max(totals["lxml"], 1e-6)
+        print(f"{len(paths)} pages, {mode}: lxml {totals['lxml'] / len(paths):.1f} ms/page, "
+              f"bs4 {totals['bs4'] / len(paths):.1f} ms/page (x{speedup:.1f})")
+    print("same extracted text from both backends" if not mismatches else f"{mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# bodystore.py
+"""Content-addressed, zstd-compressed store for article bodies.
+
+Bodies live outside the CSVs, one blob per ``body_hash`` (sha1 of the whole
+body):
+
+    <root>/ab/cd/abcd....zst
+
+The CSV keeps ``body_hash`` as the reference, so metadata-only consumers
+never pay for the text. ``read_articles()`` loads bodies lazily on access.
+Rows written before ``body_hash`` existed point to their blob by
+``content_hash`` (title + first 4000 chars), see ``body_key()``.
+
+    python bodystore.py migrate articles_simple_miriam.csv [--store bodies]
+"""
+import os, csv, sys, hashlib, argparse
+import zstandard as zstd
+
+DEFAULT_STORE = "bodies"
+ZSTD_LEVEL    = 10
+
+# Bodies can be far larger than csv's default 128 KiB field limit
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+def content_hash(title: str, content_text: str) -> str:
+    """Same key the scrapers compute: sha1(title | first 4000 chars of body)."""
+    return hashlib.sha1((title + "|" + content_text[:4000]).encode("utf-8", "ignore")).hexdigest()
+
+def body_hash(text: str) -> str:
+    """Blob key of a body: sha1 of all of it."""
+    return hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()
+
+def body_key(row) -> str:
+    """Store key of a CSV row (``content_hash`` for rows older than ``body_hash``)."""
+    return row.get("body_hash") or row.get("content_hash") or ""
+
+# ===================== STORE =====================
+class BodyStore:
+    """Blob store keyed by ``body_hash`` (40-char sha1 hex)."""
+
+    def __init__(self, root=DEFAULT_STORE, level=ZSTD_LEVEL):
+        self.root = root
+        self._cctx = zstd.ZstdCompressor(level=level)
+        self._dctx = zstd.ZstdDecompressor()
+
+    def path(self, key: str) -> str:
+        key = key.lower()
+        return os.path.join(self.root, key[:2], key[2:4], key + ".zst")
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, key: str, text: str) -> str:
+        """Store ``text`` under ``key`` (no-op if already present). Returns key.
+
+        A different text already stored under a key that is not its
+        ``body_hash`` raises ValueError instead of being dropped.
+        """
+        dst = self.path(key)
+        if os.path.exists(dst):
+            if key != body_hash(text) and self.get(key) != text:
+                raise ValueError(f"another body is already stored under {key}")
+            return key
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._cctx.compress(text.encode("utf-8")))
+        os.replace(tmp, dst)   # atomic: readers never see partial blobs
+        return key
+
+    def get(self, key: str, default=None):
+        try:
+            with open(self.path(key), "rb") as f:
+                return self._dctx.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return default
+
+    def body(self, row, default=""):
+        """Body of a CSV row: inline ``content`` if the file still has it, else from the store."""
+        return row.get("content") or self.get(body_key(row), default)
+
+# ===================== READER =====================
+class ArticleRow(dict):
+    """CSV row whose ``content`` is fetched from the store on first access."""
+
+    def __init__(self, row, store):
+        super().__init__(row)
+        self._store = store
+
+    def __missing__(self, key):
+        if key != "content":
+            raise KeyError(key)
+        body = self._store.get(body_key(self), "")
+        self["content"] = body
+        return body
+
+def read_articles(csv_path, store_dir=DEFAULT_STORE):
+    """Yield rows of ``csv_path``; ``row["content"]`` is loaded lazily.
+
+    Rows from files that still hold inline content are returned unchanged.
+    """
+    store = BodyStore(store_dir)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("content"):
+                yield row
+                continue
+            row.pop("content", None)
+            yield ArticleRow(row, store)
+
+# ===================== MIGRATION =====================
+def migrate_csv(csv_path, store_dir=DEFAULT_STORE):
+    """Move the inline ``content`` column of ``csv_path`` into the store.
+
+    The CSV is rewritten atomically without the ``content`` column, with a
+    ``body_hash`` column if it had none.
+    Returns the number of bodies written.
+    """
+    store = BodyStore(store_dir)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if "content" not in fields:
+            return 0
+        out_fields = [c for c in fields if c != "content"] + ["body_hash"] * ("body_hash" not in fields)
+        tmp = csv_path + ".tmp"
+        moved = 0
+        with open(tmp, "w", newline="", encoding="utf-8") as out:
+            writer = csv.DictWriter(out, fieldnames=out_fields, extrasaction="ignore")
+            writer.writeheader()
+            for row in reader:
+                body = row.get("content") or ""
+                if body:
+                    # Older files may lack content_hash: derive it like the scraper does
+                    row["content_hash"] = row.get("content_hash") or content_hash(row.get("title") or "", body)
+                    key = row["body_hash"] = body_hash(body)
+                    if not store.has(key):
+                        moved += 1
+                    store.put(key, body)
+                writer.writerow(row)
+    os.replace(tmp, csv_path)
+    return moved
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Article body store tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="move inline content of CSVs into the store")
+    m.add_argument("csv", nargs="+")
+    m.add_argument("--store", default=DEFAULT_STORE)
+    g = sub.add_parser("cat", help="print a stored body")
+    g.add_argument("key", help="body_hash (or content_hash of older rows)")
+    g.add_argument("--store", default=DEFAULT_STORE)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        for path in args.csv:
+            n = migrate_csv(path, args.store)
+            print(f"📦 {path}: moved {n} bodies into {args.store}/")
+    elif args.cmd == "cat":
+        body = BodyStore(args.store).get(args.key)
+        if body is None:
+            sys.exit(f"not found: {args.key}")
+        print(body)
+
+if __name__ == "__main__":
+    main()
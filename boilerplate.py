@@ -0,0 +1,140 @@
+# boilerplate.py
+"""Per-domain boilerplate learned from the pages themselves.
+
+The class filters in ``clean_join()`` only know generic names ("promo",
+"share", ...); each site adds its own newsletter blurbs, "Follow us on…"
+lines and picture credits, which used to leave Readability as the only way
+to a clean body. Instead, every extraction reports a short key for each
+selector paragraph's text and for its DOM path, and ``TemplateStats``
+counts them per domain:
+
+* a text seen on ``MIN_REPEATS`` pages (and ``TEXT_RATE`` of the domain's
+  pages) is boilerplate;
+* a DOM path whose text was mostly one already seen elsewhere is a template
+  slot (caption credits, sign-up boxes), while the article's own paragraph
+  path, whose text never repeats, is kept.
+
+Once a domain has ``MIN_PAGES`` pages, ``template(url)`` returns the two key
+sets as a ``Template``; extraction strips matching paragraphs with a set
+lookup and, if the selector text is long enough, skips Readability. Counts
+are halved every ``WINDOW`` pages so the table stays small and follows
+redesigns; it is kept in ``state/boilerplate.json``. A URL counts once per
+window: fetching a page again (revalidation, a retry) must not turn its own
+paragraphs into "repeated" text.
+"""
+import os, re, json, hashlib, threading
+from urllib.parse import urlparse
+
+DEFAULT_PATH = "state/boilerplate.json"
+MIN_PAGES    = 20       # pages of a domain before its template is used
+MIN_REPEATS  = 5        # pages a text must appear on to be boilerplate
+TEXT_RATE    = 0.02     # ...and the share of the domain's pages
+PATH_RATE    = 0.5      # share of a path's paragraphs that were repeated texts
+WINDOW       = 500      # pages per domain before counts are halved
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE  = re.compile(r"\s+")
+
+def _key(s):
+    return hashlib.blake2b(s.encode("utf-8", "ignore"), digest_size=8).hexdigest()
+
+def text_key(text):
+    """Key of a paragraph text; case, spacing and numbers ("3 hours ago") ignored."""
+    return _key(_SPACE_RE.sub(" ", _DIGITS_RE.sub("0", text.lower())).strip())
+
+def path_key(path):
+    return _key(path)
+
+def paragraph_keys(page, paras):
+    """Distinct (text_key, path_key) of the non-empty paragraph nodes on ``page``."""
+    keys = {(text_key(t), path_key(page.node_path(p))) for p in paras if (t := page.node_text(p))}
+    return sorted(keys)
+
+class Template:
+    """A domain's boilerplate keys, shipped to the parser workers with each page."""
+
+    def __init__(self, texts=(), paths=()):
+        self.texts = frozenset(texts)
+        self.paths = frozenset(paths)
+
+    def matches(self, text, path):
+        return text_key(text) in self.texts or path_key(path) in self.paths
+
+def domain(url):
+    return urlparse(url).netloc.lower()
+
+class TemplateStats:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # domain -> {"pages": n, "texts": {key: pages}, "paths": {key: [seen, repeated]},
+        #            "urls": [keys of the pages counted, oldest first]}
+        self.domains = {}
+        self.cache = {}                 # domain -> Template, dropped when the domain changes
+        self.stripped = 0               # pages extracted with a template this run
+        try:
+            with open(path) as f:
+                self.domains = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def template(self, url):
+        """The domain's ``Template`` once it has ``MIN_PAGES`` pages, else None."""
+        key = domain(url)
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+            d = self.domains.get(key)
+            tpl = None
+            if d and d["pages"] >= MIN_PAGES:
+                floor = max(MIN_REPEATS, TEXT_RATE * d["pages"])
+                tpl = Template((k for k, n in d["texts"].items() if n >= floor),
+                               (k for k, (seen, rep) in d["paths"].items()
+                                if seen >= MIN_REPEATS and rep / seen >= PATH_RATE))
+            self.cache[key] = tpl
+            return tpl
+
+    def observe(self, url, keys):
+        """Count one page's ``paragraph_keys()``, unless ``url`` was already counted."""
+        key, page = domain(url), _key(url)
+        with self.lock:
+            d = self.domains.setdefault(key, {"pages": 0, "texts": {}, "paths": {}})
+            urls = d.setdefault("urls", [])
+            if page in urls:
+                return
+            urls.append(page)
+            d["pages"] += 1
+            for tk, pk in keys:
+                repeated = d["texts"].get(tk, 0) >= 1
+                d["texts"][tk] = d["texts"].get(tk, 0) + 1
+                seen, rep = d["paths"].get(pk, (0, 0))
+                d["paths"][pk] = [seen + 1, rep + repeated]
+            if d["pages"] >= WINDOW:
+                self._halve(d)
+            if d["pages"] % MIN_PAGES == 0:
+                self.cache.pop(key, None)
+
+    @staticmethod
+    def _halve(d):
+        d["pages"] /= 2
+        # Texts seen once are most of the table and never matter: they go first
+        d["texts"] = {k: n / 2 for k, n in d["texts"].items() if n >= 2}
+        d["paths"] = {k: [s / 2, r / 2] for k, (s, r) in d["paths"].items() if s >= 2}
+        d["urls"] = d["urls"][len(d["urls"]) // 2:]
+
+    def count_stripped(self):
+        with self.lock:
+            self.stripped += 1
+
+    def summary(self):
+        with self.lock:
+            learned = sum(1 for t in self.cache.values() if t is not None)
+            return f"{self.stripped} pages extracted with learned templates ({learned} domains)"
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.lock:
+            data = json.dumps(self.domains, separators=(",", ":"))
+        with open(self.path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(self.path + ".tmp", self.path)
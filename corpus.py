@@ -0,0 +1,254 @@
+# corpus.py
+"""SQLite index over the output CSVs, for queries without reading them back.
+
+The CSVs stay the source of truth. ``CorpusIndex.sync(csv)`` reads only what
+was appended since the last sync (the byte offset is kept per file) and
+indexes it. A file whose already-indexed bytes changed (it shrank, or the
+end of the indexed part hashes differently) is indexed again from the start;
+a file merely rewritten with the same bytes (a fresh checkout) is not. Every row gets a ``seq`` that only grows, so consumers can pull
+changes since a cursor; lookups by id and by category/source/date range
+use the indexes.
+
+With a ``BodyStore`` the title, tags and body of every row also go into an
+FTS5 table (``rowid`` = ``seq``), for ranked search (BM25, title and tags
+weighted above the body) with the same filters, and bodies still inline in
+a CSV are copied to the store, so ``body_hash`` finds every body. The
+engine syncs each output right after appending to it, so the index is
+current after a run.
+
+    idx = CorpusIndex(store=BodyStore("bodies"))
+    idx.sync("bbc_articles_simple.csv")
+    idx.get("3f2a9c1b0d4e")
+    idx.query(category="World", since="2025-06-01", limit=50)
+    idx.query(story="3f2a9c1b0d4e")             # one event across sources (stories.py)
+    idx.changes(cursor=1200, limit=500)
+    idx.search('starmer "trade deal"', source="BBC", limit=20)
+    idx.rebuild(["bbc_articles_simple.csv"])    # from scratch (new seqs)
+"""
+import io, os, re, csv, sys, sqlite3, hashlib, threading
+from datetime import datetime, timezone
+
+from storage import locked
+from bodystore import body_key, body_hash
+
+DEFAULT_PATH = "state/corpus.sqlite"
+MAX_LIMIT    = 1000      # rows per page, whatever the caller asks for
+RANK_WEIGHTS = (10.0, 5.0, 1.0)   # bm25() weights of title, tags, body
+SNIPPET_WORDS = 24
+STAMP_TAIL   = 64 * 1024      # indexed bytes hashed to tell an append from a rewrite
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+def to_epoch(value):
+    """ISO date/datetime string → epoch seconds (naive = UTC), or None."""
+    if not value:
+        return None
+    try:
+        d = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp()
+
+def _filters(category=None, source=None, output=None, since=None, until=None, story=None, prefix=""):
+    """(SQL conditions, args) for the common article filters."""
+    where, args = [], []
+    for col, val in (("category", category), ("source", source), ("output", output), ("story_id", story)):
+        if val:
+            where.append(f"{prefix}{col}=?")
+            args.append(val)
+    if since:
+        where.append(f"{prefix}published>=?")
+        args.append(to_epoch(since))
+    if until:
+        where.append(f"{prefix}published<?")
+        args.append(to_epoch(until))
+    return where, args
+
+def _prefix_hash(f, end):
+    """sha1 of the ``STAMP_TAIL`` bytes of ``f`` before offset ``end``."""
+    start = max(0, end - STAMP_TAIL)
+    f.seek(start)
+    return hashlib.sha1(f.read(end - start)).hexdigest()
+
+class CorpusIndex:
+    def __init__(self, path=DEFAULT_PATH, store=None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.store = store
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS articles (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                output TEXT NOT NULL, id_article TEXT NOT NULL,
+                title TEXT, tags TEXT, url TEXT, category TEXT, source TEXT, author TEXT,
+                image TEXT, published_date TEXT, published REAL, content_hash TEXT, body_hash TEXT,
+                story_id TEXT, UNIQUE (output, id_article));
+            CREATE INDEX IF NOT EXISTS articles_id ON articles (id_article);
+            CREATE INDEX IF NOT EXISTS articles_category ON articles (category, published);
+            CREATE INDEX IF NOT EXISTS articles_source ON articles (source, published);
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published);
+            CREATE TABLE IF NOT EXISTS files (output TEXT PRIMARY KEY, offset INTEGER, header TEXT, inode INTEGER);
+        """)
+        if "tail" not in {r["name"] for r in self.db.execute("PRAGMA table_info(files)")}:
+            with self.db:
+                self.db.execute("ALTER TABLE files ADD COLUMN tail TEXT")
+        cols = {r["name"] for r in self.db.execute("PRAGMA table_info(articles)")}
+        added = [c for c in ("body_hash", "story_id") if c not in cols]
+        if added:
+            # Indexes from before these columns: read the files again to fill them in
+            with self.db:
+                for col in added:
+                    self.db.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT")
+                self.db.execute("DELETE FROM files")
+        self.db.execute("CREATE INDEX IF NOT EXISTS articles_story ON articles (story_id, published)")
+        if store is not None:
+            has_fts = self.db.execute("SELECT 1 FROM sqlite_master WHERE name='search'").fetchone()
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5("
+                            "title, tags, body, tokenize='unicode61 remove_diacritics 2')")
+            if not has_fts:
+                # Rows indexed before full-text search existed: read the files again
+                with self.db:
+                    self.db.execute("DELETE FROM files")
+
+    # ----- indexing -----
+    def sync(self, csv_path):
+        """Index rows appended to ``csv_path`` since the last sync; returns how many."""
+        try:
+            st = os.stat(csv_path)
+        except FileNotFoundError:
+            return 0
+        with self.lock:
+            state = self.db.execute("SELECT offset, header, inode, tail FROM files WHERE output=?",
+                                    (csv_path,)).fetchone()
+        if state and state["offset"] == st.st_size and state["inode"] == st.st_ino:
+            return 0
+        # Under the writers' lock, so the tail ends on a complete row
+        with locked(csv_path), open(csv_path, "rb") as f:
+            if state is None or state["offset"] > os.fstat(f.fileno()).st_size:
+                restart = True
+            elif state["tail"] is None:
+                restart = state["inode"] != os.fstat(f.fileno()).st_ino      # indexed before tail stamps
+            else:
+                # A new inode alone (checkout, copy) is not a change: compare what was indexed
+                restart = _prefix_hash(f, state["offset"]) != state["tail"]
+            if restart:
+                data = f.read()
+                offset = 0
+            else:
+                f.seek(state["offset"])
+                data = f.read()
+                offset = state["offset"]
+            inode = os.fstat(f.fileno()).st_ino
+            tail = _prefix_hash(f, offset + len(data))
+        reader = csv.reader(io.StringIO(data.decode("utf-8", "replace"), newline=""))
+        header = next(reader, None) if restart else state["header"].split(",")
+        if not header:
+            return 0
+        rows = [dict(zip(header, rec)) for rec in reader if rec]
+        with self.lock, self.db:
+            if restart:
+                self._delete(csv_path)
+            self._insert(csv_path, rows)
+            self.db.execute("INSERT OR REPLACE INTO files (output, offset, header, inode, tail) VALUES (?, ?, ?, ?, ?)",
+                            (csv_path, offset + len(data), ",".join(header), inode, tail))
+        return len(rows)
+
+    def _fts(self):
+        return self.store is not None
+
+    def _delete(self, output):
+        if self._fts():
+            self.db.execute("DELETE FROM search WHERE rowid IN (SELECT seq FROM articles WHERE output=?)", (output,))
+        self.db.execute("DELETE FROM articles WHERE output=?", (output,))
+
+    def _body_key(self, r):
+        """Store key of a row's body; inline bodies (files not migrated yet) are put in the store."""
+        if not r.get("content"):
+            return body_key(r)
+        key = r.get("body_hash") or body_hash(r["content"])
+        if self.store is not None:
+            self.store.put(key, r["content"])
+        return key
+
+    def _insert(self, output, rows):
+        for r in rows:
+            if not r.get("id_article"):
+                continue
+            cur = self.db.execute(
+                "INSERT OR IGNORE INTO articles (output, id_article, title, tags, url, category, source, author,"
+                " image, published_date, published, content_hash, body_hash, story_id)"
+                " VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                (output, r.get("id_article"), r.get("title"), r.get("tags"), r.get("url"), r.get("category"),
+                 r.get("source"), r.get("author"), r.get("image"), r.get("published_date"),
+                 to_epoch(r.get("published_date")), r.get("content_hash"), self._body_key(r),
+                 r.get("story_id") or None))
+            if cur.rowcount and self._fts():
+                # Files not migrated to the body store still carry the text inline
+                body = self.store.body(r)
+                self.db.execute("INSERT INTO search (rowid, title, tags, body) VALUES (?, ?, ?, ?)",
+                                (cur.lastrowid, r.get("title"), r.get("tags"), body))
+
+    def rebuild(self, outputs):
+        """Drop everything indexed and read ``outputs`` again from the start; returns rows indexed."""
+        with self.lock, self.db:
+            if self._fts():
+                self.db.execute("DELETE FROM search")
+            self.db.execute("DELETE FROM articles")
+            self.db.execute("DELETE FROM files")
+        return sum(self.sync(path) for path in outputs)
+
+    # ----- queries -----
+    def _rows(self, sql, args):
+        with self.lock:
+            return [dict(r) for r in self.db.execute(sql, args)]
+
+    def get(self, id_article):
+        """Every output's row for ``id_article`` (usually one)."""
+        return self._rows("SELECT * FROM articles WHERE id_article=? ORDER BY seq", (id_article,))
+
+    def query(self, category=None, source=None, output=None, since=None, until=None, story=None,
+              limit=100, offset=0):
+        """Rows matching the filters, newest published first. ``since``/``until``: ISO dates,
+        ``story``: a ``story_id`` (every source's article about one event)."""
+        where, args = _filters(category, source, output, since, until, story)
+        sql = "SELECT * FROM articles" + (" WHERE " + " AND ".join(where) if where else "")
+        sql += " ORDER BY published DESC, seq DESC LIMIT ? OFFSET ?"
+        return self._rows(sql, [*args, min(limit, MAX_LIMIT), max(offset, 0)])
+
+    def changes(self, cursor=0, limit=100):
+        """Rows indexed after ``cursor`` (a ``seq``), oldest first."""
+        return self._rows("SELECT * FROM articles WHERE seq>? ORDER BY seq LIMIT ?",
+                          (cursor, min(limit, MAX_LIMIT)))
+
+    def search(self, text, category=None, source=None, output=None, since=None, until=None, story=None,
+               limit=20, offset=0):
+        """Best matches for ``text`` (FTS5 query syntax), with ``rank`` and a body ``snippet``.
+
+        ``text`` that is not a valid FTS5 query is searched as plain words.
+        """
+        where, args = _filters(category, source, output, since, until, story, prefix="a.")
+        sql = ("SELECT a.*, bm25(search, ?, ?, ?) AS rank,"
+               " snippet(search, 2, '[', ']', '…', ?) AS snippet"
+               " FROM search JOIN articles a ON a.seq = search.rowid"
+               " WHERE search MATCH ?" + "".join(" AND " + w for w in where) +
+               " ORDER BY rank LIMIT ? OFFSET ?")
+        page = [min(limit, MAX_LIMIT), max(offset, 0)]
+        try:
+            return self._rows(sql, [*RANK_WEIGHTS, SNIPPET_WORDS, text, *args, *page])
+        except sqlite3.OperationalError:
+            words = " ".join(f'"{w}"' for w in _TERM_RE.findall(text))
+            if not words:
+                return []
+            return self._rows(sql, [*RANK_WEIGHTS, SNIPPET_WORDS, words, *args, *page])
+
+    def last_seq(self):
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM articles").fetchone()[0]
+
+    def close(self):
+        self.db.close()
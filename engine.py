@@ -0,0 +1,701 @@
+# engine.py
+"""Multi-source scraping engine.
+
+Every source in ``sources/*.json`` runs in one process and shares the HTTP
+session (connection pools), the per-host rate limiter, the parser worker pool
+and the dedupe index, so one scheduled run takes roughly the wall-time of the
+slowest source:
+
+    python engine.py run                    # every source
+    python engine.py run --only bbc sarra   # a subset
+    python engine.py run --budget 2700      # stop fetching after 45 min, rest rolls over
+    python engine.py daemon                 # stay resident, poll feeds adaptively
+    python engine.py worker --follow        # one of N processes draining a shared queue
+    python engine.py backfill bbc --since 2025-06-01   # crawl history from sitemaps
+    python engine.py revalidate --days 2    # conditional re-fetch, record edited bodies
+    python engine.py export bbc -o bbc.parquet   # analytics export (imports pandas)
+    python engine.py serve --port 8080      # local JSON API over the outputs (service.py)
+    python engine.py --push spool:///var/spool/news daemon   # also push new rows as they come (push.py)
+    python engine.py search "trade deal" --source BBC   # ranked full-text search (corpus.py)
+    python engine.py index --rebuild        # re-index existing CSVs for serve/search
+    python engine.py stories --days 1       # biggest cross-source stories (stories.py)
+"""
+import os, sys, time, fcntl, signal, argparse, threading
+from contextlib import contextmanager
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from sources import load_sources, DEFAULT_DIR as CONFIG_DIR
+from fetcher import Fetcher, ResponseRejected, NOT_MODIFIED, page_body, HTML_TYPES
+from extract import normalize_url, article_id, needs_amp, extract_amp, best_text, finalize
+from parsepool import ParserPool, run_within
+from feeds import parse_feed
+from amp import AmpSpeculator
+from storage import ensure_csv, append_rows, export_frame, locked, file_stamp
+from bodystore import BodyStore
+from neardup import NearDupIndex, jaccard, seed_from_csv
+from seenset import load_seen, save_seen
+from polling import Schedule
+from frontier import open_frontier, priority, DONE, SKIPPED
+from backfill import backfill, BATCH_SIZE
+from revisions import Validators, revalidate, REVALIDATE_DAYS
+from urlmap import UrlMap
+from boilerplate import TemplateStats
+from corpus import CorpusIndex
+from service import serve, DEFAULT_PORT
+from push import Publisher
+from textvec import DocFreq
+from keywords import keyword_batch, article_text, BATCH_ROWS as KEYWORD_BATCH
+from stories import StoryIndex, seed_stories, STORY_DAYS
+
+# ===================== CONFIG =====================
+BODY_STORE_DIR    = "bodies"      # article text lives here, keyed by body_hash
+STATE_DIR         = "state"
+NEARDUP_DB        = os.path.join(STATE_DIR, "neardup.sqlite")
+NEARDUP_THRESHOLD = 0.85          # estimated Jaccard over body shingles to count as a duplicate
+SEEN_DIR          = os.path.join(STATE_DIR, "seen")
+SCHEDULE_PATH     = os.path.join(STATE_DIR, "feeds.json")   # daemon polling state
+FRONTIER_DB       = os.path.join(STATE_DIR, "frontier.sqlite")
+REVISIONS_DB      = os.path.join(STATE_DIR, "revisions.sqlite")   # per-article validators
+BANDWIDTH_LOG     = os.path.join(STATE_DIR, "bandwidth.csv")      # per-run, per-host bytes
+AMP_STATS         = os.path.join(STATE_DIR, "amp_stats.json")     # learned thin-page sections
+URLMAP_DB         = os.path.join(STATE_DIR, "urlmap.sqlite")      # feed link -> final / canonical URL
+BOILERPLATE_STATS = os.path.join(STATE_DIR, "boilerplate.json")   # learned per-domain boilerplate
+CORPUS_DB         = os.path.join(STATE_DIR, "corpus.sqlite")      # query index of the outputs (serve)
+OUTBOX_DB         = os.path.join(STATE_DIR, "outbox.sqlite")      # rows not yet taken by --push targets
+TEXTVEC_DB        = os.path.join(STATE_DIR, "textvec.sqlite")     # corpus document frequencies
+STORIES_DB        = os.path.join(STATE_DIR, "stories.sqlite")     # story_id per article + recent vectors
+RUN_LOCK          = os.path.join(STATE_DIR, "run.lock")
+
+FETCH_WORKERS = 16                # threads doing HTTP (politeness is per host)
+PARSE_WORKERS = os.cpu_count() or 2
+IDLE_WAIT     = 0.05              # seconds a worker waits when every due host is cooling down
+FLUSH_MARGIN  = 30                # seconds of a --budget kept for in-flight fetches + flush
+WORKER_POLL   = 5.0               # seconds a --follow worker sleeps when the queue is empty
+MAX_FEED_BYTES = 16 * 2**20       # feeds larger than this are abandoned mid-download
+
+# ===================== DEDUPE =====================
+class Dedupe:
+    """Exact id_article sets per output CSV + one near-duplicate index scoped per output."""
+
+    def __init__(self, store, index_path=NEARDUP_DB, threshold=NEARDUP_THRESHOLD, seen_dir=SEEN_DIR):
+        self.store = store
+        self.seen_dir = seen_dir
+        self.index = NearDupIndex(index_path, threshold=threshold)
+        self.seen = {}
+        self.stamps = {}                   # output_csv -> (size, mtime) after our last write
+        self.pending = defaultdict(list)   # output_csv -> [(row, sig)]
+
+    def open(self, output_csv):
+        if output_csv in self.seen:
+            return
+        with locked(output_csv):
+            ensure_csv(output_csv)
+            self.seen[output_csv] = load_seen(output_csv, "id_article", self.seen_dir)
+            self.stamps[output_csv] = file_stamp(output_csv)
+        if self.index.count(output_csv) == 0:
+            n = seed_from_csv(self.index, output_csv, self.store.root, output_csv)
+            print(f"[neardup] indexed {n} existing articles of {output_csv}")
+
+    def accept(self, output_csv, row, link=""):
+        """True (and queued for writing) if ``row`` is new for ``output_csv``."""
+        seen = self.seen[output_csv]
+        if row["id_article"] in seen:
+            return False
+        # Same story re-published with small edits / a new headline
+        sig = self.index.signature(row["content"])
+        dup = self.index.query(sig, output_csv) or [
+            r["id_article"] for r, s in self.pending[output_csv]
+            if jaccard(sig, s) >= self.index.threshold
+        ]
+        if dup:
+            print(f"[near-dup] {link or row['url']} ~ {dup[0]}")
+            return False
+        seen.add(row["id_article"])
+        self.pending[output_csv].append((row, sig))
+        return True
+
+    def flush(self, output_csv):
+        """Append queued rows to ``output_csv`` and persist the index. Returns count.
+
+        Runs under the output's file lock. If another worker process appended
+        since our last write, the batch is checked again against its rows, so
+        each article lands in the CSV and the index exactly once.
+        """
+        batch = self.pending.pop(output_csv, [])
+        if not batch:
+            return 0
+        with locked(output_csv):
+            if file_stamp(output_csv) != self.stamps.get(output_csv):
+                seen = load_seen(output_csv, "id_article", self.seen_dir)
+                batch = [(row, sig) for row, sig in batch
+                         if row["id_article"] not in seen and not self.index.query(sig, output_csv)]
+                for row, _ in batch:
+                    seen.add(row["id_article"])
+                self.seen[output_csv] = seen
+            if batch:
+                append_rows(output_csv, [row for row, _ in batch], self.store)
+                for row, sig in batch:
+                    self.index.add(row["id_article"], sig, output_csv)
+                save_seen(self.seen[output_csv], output_csv, "id_article", self.seen_dir)
+            self.stamps[output_csv] = file_stamp(output_csv)
+        return len(batch)
+
+# ===================== PIPELINE =====================
+def read_feed(fetcher, src, category, feed_url, state=None, limit=None):
+    """(entries, info) of one feed: [(link, published_epoch_or_None)], capped at ``limit``
+    (default: the source's max_per_feed).
+
+    With a ``polling.FeedState`` the request is conditional; a 304 yields no
+    entries. ``info`` is None when the feed could not be read.
+    """
+    print(f"[feed] {src.name}/{category} → {feed_url}")
+    try:
+        headers = state.conditional_headers() if state else {}
+        r = fetcher.get(feed_url, src.user_agent, src.pause_seconds, MAX_FEED_BYTES, headers=headers)
+        if r.status_code == 304:
+            return [], {"headers": r.headers, "ttl": None}
+        items, ttl = parse_feed(r.content, limit or src.max_per_feed)
+    except Exception as e:
+        print(f"[skip feed] {feed_url} -> {e}")
+        return [], None
+    # Normalize RSS link early to reduce duplicates before fetch
+    entries = [(normalize_url(e["link"]), e["published"]) for e in items if e["link"]]
+    return entries, {"headers": r.headers, "ttl": ttl}
+
+def scrape_link(fetcher, parsers, link, targets, headers=None, amp=None, fetch_url=None, templates=None,
+                learn=True):
+    """Fetch ``link`` once and extract it for every (source, category) that lists it.
+
+    Returns [(source, row)], or None if the page could not be fetched. Rows
+    carry the response's ``etag`` / ``last_modified`` validators; with
+    conditional ``headers`` a 304 returns ``NOT_MODIFIED`` (empty). Non-HTML and oversized
+    responses are dropped after their headers / first ``max_page_bytes``.
+    With an ``amp.AmpSpeculator`` the AMP version of a likely-thin page is
+    fetched while the page is being extracted. ``fetch_url`` (where ``link``
+    is known to redirect) is downloaded instead of ``link``; rows record the
+    URL actually served as ``final_url``. With a ``boilerplate.TemplateStats``
+    the domain's learned boilerplate is stripped and, unless ``learn`` is
+    False (re-fetches of stored articles), the page is counted towards it.
+    Re-fetches extracted with a template also carry ``plain_content``, the
+    body extracted without it, since the stored body may predate the template.
+    """
+    src0 = targets[0][0]
+    try:
+        r = fetcher.get(fetch_url or link, src0.user_agent, src0.pause_seconds, src0.max_page_bytes, HTML_TYPES,
+                        headers=dict(headers or {}))
+    except ResponseRejected as e:
+        print(f"[skip page] {link} -> {e}")
+        return []
+    except Exception as e:
+        print(f"[skip fetch] {link} -> {e}")
+        return None
+    if r.status_code == 304:
+        return NOT_MODIFIED
+    html = page_body(r)
+    spec = amp.start(fetcher, src0, link, html) if amp else None
+    template = templates.template(link) if templates else None
+    out, amp_text, has_amp, used_amp, observed = [], None, False, False, not templates or not learn
+    for src, category in targets:
+        try:
+            art = parsers.extract(html, link, category, src.body_selectors, template)
+            paragraphs = art.pop("paragraphs")
+            if not observed:
+                templates.observe(link, paragraphs)
+                observed = True
+            has_amp = has_amp or bool(art["amp"])
+            # 4) AMP fallback (fetched at most once per link, maybe already in flight)
+            if needs_amp(art):
+                used_amp = True
+                if amp_text is None:
+                    try:
+                        if spec is not None:
+                            amp_html = spec.result()
+                        else:
+                            amp_html = page_body(fetcher.get(art["amp"], src.user_agent, src.pause_seconds,
+                                                             src.max_page_bytes, HTML_TYPES))
+                        amp_text = parsers.run(run_within, extract_amp, amp_html)
+                    except Exception:
+                        amp_text = ""
+                art["content"] = best_text(art["content"], amp_text)
+            row = finalize(art, src.source_name(art["url"]))
+            if row and not learn and template is not None:
+                plain = parsers.extract(html, link, category, src.body_selectors)
+                row["plain_content"] = plain["content"].strip()
+            if row:
+                row["etag"], row["last_modified"] = r.headers.get("ETag"), r.headers.get("Last-Modified")
+                row["final_url"] = normalize_url(r.url)
+                out.append((src, row))
+        except Exception as ex:
+            print("[skip]", link, "->", ex)
+    if template is not None:
+        templates.count_stripped()
+    if amp:
+        amp.finish(spec, used_amp)
+        if has_amp:
+            amp.observe(link, used_amp)
+    return out
+
+class Engine:
+    """Warm state shared by every source: session, limiter, worker pools, dedupe index, frontier."""
+
+    def __init__(self, sources, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS,
+                 queue=FRONTIER_DB, push=()):
+        self.sources = sources
+        self.by_name = {src.name: src for src in sources}
+        self.store = BodyStore(BODY_STORE_DIR)
+        self.dedupe = Dedupe(self.store)
+        self.frontier = open_frontier(queue)
+        self.validators = Validators(REVISIONS_DB)
+        self.urlmap = UrlMap(URLMAP_DB)
+        self.corpus = CorpusIndex(CORPUS_DB, self.store)
+        self.push = Publisher(push, OUTBOX_DB) if push else None
+        self.docfreq = DocFreq(TEXTVEC_DB)
+        self.stories = StoryIndex(STORIES_DB, self.docfreq)
+        self.fetcher = Fetcher()
+        self.fetch_workers = fetch_workers
+        self.io = ThreadPoolExecutor(fetch_workers)
+        self.parsers = ParserPool(parse_workers, selectors={sel for src in sources for sel in src.body_selectors})
+        self.amp = AmpSpeculator(max(2, fetch_workers // 4), AMP_STATS)
+        self.templates = TemplateStats(BOILERPLATE_STATS)
+        for src in sources:
+            self.dedupe.open(src.output_csv)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.io.shutdown()
+        if self.push:
+            self.push.close()
+            print(f"[push] {self.push.summary()}")
+        if self.parsers.stats:
+            print(f"[parse] {self.parsers.summary()}")
+        if self.amp.counts["started"]:
+            print(f"[amp] {self.amp.summary()}")
+        self.amp.shutdown()
+        self.amp.save()
+        if self.templates.stripped:
+            print(f"[boilerplate] {self.templates.summary()}")
+        self.templates.save()
+        print(f"[bandwidth] {self.fetcher.bandwidth.summary()}")
+        self.fetcher.bandwidth.save(BANDWIDTH_LOG)
+        self.parsers.shutdown()
+        self.frontier.close()
+        self.validators.close()
+        self.urlmap.close()
+        self.corpus.close()
+        self.stories.close()
+        self.docfreq.close()
+
+    def scrape(self, link, targets, headers=None, learn=True):
+        """``scrape_link()`` with the engine's fetcher and parser pool.
+
+        Goes straight to the URL ``link`` last redirected to; if that fails
+        the mapping is dropped and ``link`` itself is fetched. Re-fetches of
+        stored articles pass ``learn=False`` (see ``scrape_link()``).
+        """
+        final = self.urlmap.final(link)
+        if final != link:
+            results = scrape_link(self.fetcher, self.parsers, link, targets, headers, self.amp, final,
+                                  self.templates, learn)
+            if results is not None:
+                return results
+            self.urlmap.forget(link)
+        return scrape_link(self.fetcher, self.parsers, link, targets, headers, self.amp,
+                           templates=self.templates, learn=learn)
+
+    def already_stored(self, link, targets):
+        """True if every target's CSV has ``link``, by its own id or its known canonical URL's."""
+        ids = {article_id(link)}
+        canonical = self.urlmap.canonical(link)
+        if canonical:
+            ids.add(article_id(canonical))
+        return all(any(i in self.dedupe.seen[src.output_csv] for i in ids) for src, _ in targets)
+
+    def feeds(self):
+        """Every (source, category, feed_url) of the loaded sources."""
+        return [(src, category, url) for src in self.sources for category, url in src.feeds.items()]
+
+    def read_feeds(self, feeds, schedule=None):
+        """Read ``feeds`` in parallel and queue their entries; returns how many URLs are new.
+
+        A feed URL shared by several sources is requested once. With a
+        ``polling.Schedule`` each feed's next poll is rescheduled from the
+        entries it had not shown before.
+        """
+        by_url = defaultdict(list)
+        for src, category, url in feeds:
+            by_url[url].append((src, category))
+        jobs = {}
+        for url, subs in by_url.items():
+            src, category = subs[0]
+            limit = max(s.max_per_feed for s, _ in subs)
+            jobs[self.io.submit(read_feed, self.fetcher, src, category, url,
+                                schedule.get(url) if schedule else None, limit)] = url
+        queued = []
+        for fut in as_completed(jobs):
+            url = jobs[fut]
+            entries, info = fut.result()
+            if schedule is not None:
+                state = schedule.get(url)
+                links = [link for link, _ in entries]
+                if info is None:
+                    state.failed()
+                else:
+                    state.observe(len(state.new_links(links)), links, info["headers"], info["ttl"])
+            for src, category in by_url[url]:
+                weight = src.category_weights.get(category, 0.0)
+                queued += [(link, src.name, category, priority(published, weight))
+                           for link, published in entries[:src.max_per_feed]]
+        return self.frontier.push(queued)
+
+    def process(self, sources=None, limit=None, quiet=False, deadline=None):
+        """Drain the frontier for ``sources`` with every fetch worker, then flush.
+
+        Each worker leases the highest-priority due URL whose host is outside
+        its politeness delay. Stops after ``limit`` URLs, when nothing is due,
+        or, for new fetches, once ``time.monotonic()`` passes ``deadline``;
+        whatever is left stays queued for the next run.
+        Returns {output_csv: rows appended}.
+        """
+        names = [s.name for s in (sources or self.sources)]
+        lock = threading.Lock()
+        done, skipped, failed = [], [], []     # (url, source) pairs
+        validators = []                        # (output_csv, id_article, etag, last_modified)
+        resolved = []                          # (link, final_url, canonical_url)
+        budget = [limit]
+
+        def worker():
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                with lock:
+                    if budget[0] is not None and budget[0] <= 0:
+                        return
+                    item = self.frontier.lease(names, self.fetcher.limiter.ready)
+                    if item and budget[0] is not None:
+                        budget[0] -= 1
+                if item is None:
+                    if not self.frontier.pending(names):
+                        return
+                    time.sleep(IDLE_WAIT)      # everything due is on a host that is cooling down
+                    continue
+                url, targets = item
+                pairs = [(url, name) for name, _ in targets]
+                targets = [(self.by_name[name], category) for name, category in targets]
+                with lock:
+                    # Already stored under this URL or its canonical: no need to download it again
+                    known = self.already_stored(url, targets)
+                if known:
+                    with lock:
+                        skipped.extend(pairs)
+                    continue
+                results = self.scrape(url, targets)
+                accepted = []
+                with lock:
+                    if results is None:
+                        failed.extend(pairs)
+                        continue
+                    done.extend(pairs)
+                    if results:
+                        resolved.append((url, results[0][1]["final_url"], results[0][1]["url"]))
+                    for src, row in results:
+                        if self.dedupe.accept(src.output_csv, row):
+                            print(f"✓ [{src.name}] {row['title'][:80]}…")
+                            validators.append((src.output_csv, row["id_article"],
+                                               row["etag"], row["last_modified"]))
+                            accepted.append((src, row))
+                # Outside the lock: a slow consumer only holds up this worker
+                if self.push:
+                    for src, row in accepted:
+                        self.push.write(src, row)
+
+        for fut in [self.io.submit(worker) for _ in range(self.fetch_workers)]:
+            fut.result()
+        written = self.flush(quiet)
+        self.validators.remember(validators)
+        self.urlmap.record(resolved)
+        # Only after the flush: a crash before this point re-crawls these URLs
+        self.frontier.mark(done, DONE)
+        self.frontier.mark(skipped, SKIPPED)
+        self.frontier.retry_later(failed)
+        # Let other workers rebalance the hosts this batch held
+        self.frontier.release_hosts()
+        return written
+
+    def add_keywords(self, rows):
+        """Fill ``tags`` of rows without meta keywords with their TF-IDF keywords, in a parser worker."""
+        if not rows:
+            return
+        idf = self.docfreq.idf()
+        for start in range(0, len(rows), KEYWORD_BATCH):
+            chunk = rows[start:start + KEYWORD_BATCH]
+            try:
+                tags = self.parsers.run(run_within, keyword_batch, [article_text(r) for r in chunk], idf)
+            except TimeoutError as e:
+                print(f"[keywords] {len(chunk)} rows left without tags: {e}")
+                continue
+            for row, t in zip(chunk, tags):
+                row["tags"] = t or None
+        print(f"🏷️ Keywords for {len(rows)} rows without meta tags")
+
+    def flush(self, quiet=False):
+        """Write accepted rows of every output; returns {output_csv: rows appended}."""
+        written = {}
+        pending = [(path, row) for path, batch in self.dedupe.pending.items() for row, _ in batch]
+        # One vectorized clustering pass over everything about to be written
+        self.stories.assign(pending)
+        # After assign(): the document frequencies include this batch
+        self.add_keywords([row for _, row in pending if not row.get("tags")])
+        for src in self.sources:
+            n = self.dedupe.flush(src.output_csv)
+            written[src.output_csv] = written.get(src.output_csv, 0) + n
+            if n:
+                print(f"💾 Appended {n} new rows to {src.output_csv}")
+                # Keep serve/search current (reads just the appended tail)
+                self.corpus.sync(src.output_csv)
+            elif not quiet:
+                print(f"No new rows for {src.name}.")
+        return written
+
+@contextmanager
+def run_lock(path=RUN_LOCK):
+    """Exclusive lock for one-shot runs; yields False if another run holds it."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def run(sources, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS, budget=None,
+        queue=FRONTIER_DB, push=()):
+    """Scrape ``sources`` in one pass; returns {output_csv: rows appended}.
+
+    With ``budget`` (seconds) no new fetch starts after the budget minus
+    ``FLUSH_MARGIN``; the most recent entries are fetched first and the rest
+    stays in the frontier for the next run. A run that finds another one
+    still holding the lock exits at once instead of piling up behind it.
+    """
+    start = time.monotonic()
+    deadline = start + max(0.0, budget - FLUSH_MARGIN) if budget else None
+    with run_lock() as acquired:
+        if not acquired:
+            print("[run] previous run still in progress; skipping this one")
+            return {}
+        with Engine(sources, fetch_workers, parse_workers, queue, push) as eng:
+            eng.read_feeds(eng.feeds())
+            written = eng.process(deadline=deadline)
+            left = eng.frontier.pending([s.name for s in sources])
+            if left:
+                print(f"[run] {left} URLs left for the next run ({time.monotonic() - start:.0f}s used)")
+            eng.frontier.prune()
+            eng.urlmap.prune()
+            return written
+
+def stop_event():
+    """Event set by SIGINT/SIGTERM, for loops that should finish their batch and exit."""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    return stop
+
+def daemon(sources, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS,
+           schedule_path=SCHEDULE_PATH, queue=FRONTIER_DB, push=()):
+    """Poll each feed on its own adaptive interval until SIGINT/SIGTERM."""
+    stop = stop_event()
+    schedule = Schedule(schedule_path)
+    with Engine(sources, fetch_workers, parse_workers, queue, push) as eng:
+        feeds = eng.feeds()
+        urls = [url for _, _, url in feeds]
+        print(f"[daemon] {len(sources)} sources, {len(feeds)} feeds")
+        while not stop.is_set():
+            due = set(schedule.due(urls))
+            if due:
+                eng.read_feeds([f for f in feeds if f[2] in due], schedule)
+                schedule.save()
+            # Also picks up retries whose back-off has expired
+            eng.process(quiet=True)
+            stop.wait(max(1.0, schedule.next_wakeup(urls) - time.time()))
+        print("[daemon] stopping")
+        eng.flush(quiet=True)
+        schedule.save()
+
+def worker(sources, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS,
+           queue=FRONTIER_DB, batch=BATCH_SIZE, follow=False, enqueue=False, push=()):
+    """Drain a frontier shared with other worker processes; returns rows appended.
+
+    Each batch leases URLs on hosts no other live worker holds (at most its
+    fair share of them), flushes under the outputs' file locks and only then
+    marks them done. Without ``follow`` the worker exits once nothing is due,
+    not even on hosts other workers hold; with it, it waits for new work
+    (queued by ``run``/``daemon``/``backfill`` or an ``--enqueue`` worker).
+    """
+    stop = stop_event()
+    names = [s.name for s in sources]
+    total = 0
+    with Engine(sources, fetch_workers, parse_workers, queue, push) as eng:
+        print(f"[worker {eng.frontier.owner}] {len(sources)} sources, queue {queue}")
+        if enqueue:
+            eng.read_feeds(eng.feeds())
+        while not stop.is_set():
+            eng.frontier.reclaim()
+            if not eng.frontier.pending(names):
+                # Hosts with due work held by another live worker come free after its batch
+                if not follow and not eng.frontier.held_elsewhere(names):
+                    break
+                stop.wait(WORKER_POLL)
+                continue
+            total += sum(eng.process(limit=batch, quiet=True).values())
+        print(f"[worker {eng.frontier.owner}] stopping, {total} rows appended")
+    return total
+
+# ===================== CLI =====================
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    ap = argparse.ArgumentParser(description="Multi-source news scraper")
+    ap.add_argument("--config-dir", default=CONFIG_DIR, help="directory of per-source JSON files")
+    ap.add_argument("--queue", default=FRONTIER_DB,
+                    help="frontier: SQLite path or backend://location (see frontier.py)")
+    ap.add_argument("--push", action="append", default=[], metavar="TARGET",
+                    help="also push accepted rows to unix://, fifo://, http(s):// or spool:// (see push.py)")
+    sub = ap.add_subparsers(dest="cmd")
+    r = sub.add_parser("run", help="scrape the feeds of every (or selected) source once")
+    r.add_argument("--only", nargs="+", metavar="SOURCE", help="source names (file names in config dir)")
+    r.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    r.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    r.add_argument("--budget", type=float, metavar="SECONDS",
+                   help="stop starting fetches after this long; leftovers carry over to the next run")
+    d = sub.add_parser("daemon", help="keep running and poll each feed on its own adaptive interval")
+    d.add_argument("--only", nargs="+", metavar="SOURCE")
+    d.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    d.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    d.add_argument("--schedule", default=SCHEDULE_PATH, help="polling state file")
+    w = sub.add_parser("worker", help="drain the shared queue alongside other worker processes")
+    w.add_argument("--only", nargs="+", metavar="SOURCE")
+    w.add_argument("--batch", type=int, default=BATCH_SIZE, help="URLs per checkpoint")
+    w.add_argument("--follow", action="store_true", help="wait for new work instead of exiting")
+    w.add_argument("--enqueue", action="store_true", help="read the feeds into the queue first")
+    w.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    w.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    b = sub.add_parser("backfill", help="crawl a source's sitemaps (resumable)")
+    b.add_argument("source")
+    b.add_argument("--sitemap", nargs="+", default=(), help="sitemap / sitemap-index URLs to add")
+    b.add_argument("--since", help="skip entries older than this ISO date")
+    b.add_argument("--limit", type=int, help="stop after this many URLs (resume later)")
+    b.add_argument("--batch", type=int, default=BATCH_SIZE, help="URLs per checkpoint")
+    b.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    b.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    v = sub.add_parser("revalidate", help="re-check recent articles and record edited bodies")
+    v.add_argument("--only", nargs="+", metavar="SOURCE")
+    v.add_argument("--days", type=float, default=REVALIDATE_DAYS, help="articles published this recently")
+    v.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    v.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    x = sub.add_parser("export", help="export a source's rows with bodies inlined (uses pandas)")
+    x.add_argument("source")
+    x.add_argument("-o", "--output", required=True, help=".csv, .json/.jsonl or .parquet")
+    x.add_argument("--no-content", action="store_true", help="metadata columns only")
+    s = sub.add_parser("serve", help="local HTTP API over the outputs (by id, filters, changes since a cursor)")
+    s.add_argument("--only", nargs="+", metavar="SOURCE")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=DEFAULT_PORT)
+    s.add_argument("--index", default=CORPUS_DB, help="SQLite index of the outputs")
+    q = sub.add_parser("search", help="ranked full-text search over the outputs")
+    q.add_argument("query", help='words, "a phrase", OR / NOT / prefix* (SQLite FTS5 syntax)')
+    q.add_argument("--only", nargs="+", metavar="SOURCE")
+    q.add_argument("--category")
+    q.add_argument("--source", help="value of the source column")
+    q.add_argument("--since", help="published on or after this ISO date")
+    q.add_argument("--until", help="published before this ISO date")
+    q.add_argument("--limit", type=int, default=20)
+    i = sub.add_parser("index", help="bring the search/serve index up to date with the outputs")
+    i.add_argument("--only", nargs="+", metavar="SOURCE")
+    i.add_argument("--rebuild", action="store_true", help="drop the index and read every CSV again")
+    t = sub.add_parser("stories", help="largest recent cross-source stories")
+    t.add_argument("--only", nargs="+", metavar="SOURCE")
+    t.add_argument("--days", type=float, default=1.0, help="stories with articles this recent")
+    t.add_argument("--limit", type=int, default=20)
+    t.add_argument("--seed", action="store_true",
+                   help=f"first cluster the last {STORY_DAYS} days of the outputs that have no story_id yet")
+    args = ap.parse_args(argv or ["run"])
+
+    if args.cmd is None:
+        ap.error("missing command")
+    if args.cmd == "run":
+        sources = load_sources(args.config_dir, args.only)
+        run(sources, args.fetch_workers, args.parse_workers, args.budget, args.queue, args.push)
+    elif args.cmd == "daemon":
+        sources = load_sources(args.config_dir, args.only)
+        daemon(sources, args.fetch_workers, args.parse_workers, args.schedule, args.queue, args.push)
+    elif args.cmd == "worker":
+        sources = load_sources(args.config_dir, args.only)
+        worker(sources, args.fetch_workers, args.parse_workers, args.queue,
+               args.batch, args.follow, args.enqueue, args.push)
+    elif args.cmd == "backfill":
+        sources = load_sources(args.config_dir, [args.source])
+        since = None
+        if args.since:
+            since = datetime.fromisoformat(args.since)
+            since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        with Engine(sources, args.fetch_workers, args.parse_workers, args.queue, args.push) as eng:
+            n = backfill(eng, sources[0], args.sitemap, since, args.limit, args.batch)
+        print(f"💾 Backfill appended {n} rows to {sources[0].output_csv}")
+    elif args.cmd == "revalidate":
+        sources = load_sources(args.config_dir, args.only)
+        with Engine(sources, args.fetch_workers, args.parse_workers, args.queue, args.push) as eng:
+            revalidate(eng, sources, args.days)
+    elif args.cmd == "export":
+        src = load_sources(args.config_dir, [args.source])[0]
+        df = export_frame(src.output_csv, BODY_STORE_DIR, with_content=not args.no_content)
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        elif args.output.endswith((".json", ".jsonl")):
+            df.to_json(args.output, orient="records", lines=args.output.endswith(".jsonl"), force_ascii=False)
+        else:
+            df.to_csv(args.output, index=False)
+        print(f"📤 Exported {len(df)} rows of {src.output_csv} to {args.output}")
+    elif args.cmd == "serve":
+        sources = load_sources(args.config_dir, args.only)
+        serve([src.output_csv for src in sources], args.host, args.port, args.index, BODY_STORE_DIR)
+    elif args.cmd in ("search", "index"):
+        outputs = sorted({src.output_csv for src in load_sources(args.config_dir, args.only)})
+        corpus = CorpusIndex(CORPUS_DB, BodyStore(BODY_STORE_DIR))
+        if args.cmd == "index" and args.rebuild:
+            print(f"🔎 Re-indexed {corpus.rebuild(outputs)} rows of {len(outputs)} outputs")
+        else:
+            n = sum(corpus.sync(path) for path in outputs)
+            if args.cmd == "index":
+                print(f"🔎 Indexed {n} new rows of {len(outputs)} outputs")
+        if args.cmd == "search":
+            hits = corpus.search(args.query, args.category, args.source, since=args.since,
+                                 until=args.until, limit=args.limit)
+            for hit in hits:
+                print(f"{hit['published_date'] or '':25.25} [{hit['source']}/{hit['category']}] {hit['title']}")
+                print(f"    {hit['url']}")
+                print(f"    {hit['snippet']}")
+            if not hits:
+                print("no matches")
+        corpus.close()
+    elif args.cmd == "stories":
+        outputs = sorted({src.output_csv for src in load_sources(args.config_dir, args.only)})
+        docfreq = DocFreq(TEXTVEC_DB)
+        index = StoryIndex(STORIES_DB, docfreq)
+        if args.seed:
+            print(f"🧩 Clustered {seed_stories(index, outputs, BodyStore(BODY_STORE_DIR))} existing articles")
+        for story_id, n, outs in index.largest(args.days, args.limit):
+            print(f"{story_id}  {n:4d} articles in {outs} outputs")
+        index.close()
+        docfreq.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# extract.py
+"""Article extraction, shared by every source.
+
+Extraction is pure (HTML in, dict out) so it can run in the parser worker
+pool; the only network step, the AMP fallback, is left to the caller:
+
+    art = extract(html, url, category, selectors)
+    if needs_amp(art):
+        art["content"] = best_text(art["content"], extract_amp(fetch(art["amp"]).text))
+    row = finalize(art, source_label)
+"""
+import hashlib, json
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from htmlparse import parse_html, DEFAULT_BACKEND
+from boilerplate import paragraph_keys
+from bodystore import body_hash
+
+MIN_BODY_CHARS  = 800     # below this we keep trying the next strategy
+THIN_BODY_CHARS = 200     # below this the page is skipped
+
+# Tracking params to strip when normalizing URLs
+STRIP_QUERY_PARAMS = {
+    "utm_source","utm_medium","utm_campaign","utm_term","utm_content",
+    "at_medium","at_campaign","at_custom1","ns_mchannel","ns_source","ns_campaign"
+}
+
+# ===================== UTILS =====================
+def normalize_url(u: str) -> str:
+    """Normalize URL: lowercase host, strip fragment & tracking params, trim trailing slash."""
+    p = urlparse(u)
+    q = {k: v for k, v in parse_qsl(p.query, keep_blank_values=True)
+         if k not in STRIP_QUERY_PARAMS}
+    clean = p._replace(
+        scheme=p.scheme.lower(),
+        netloc=p.netloc.lower(),
+        path=p.path.rstrip("/"),
+        query=urlencode(q, doseq=True),
+        fragment=""
+    )
+    return urlunparse(clean)
+
+def article_id(url: str) -> str:
+    return hashlib.sha1(url.encode()).hexdigest()[:12]
+
+# ===================== EXTRACTION =====================
+def extract(html, url, category, selectors, cheap=False, backend=DEFAULT_BACKEND, template=None):
+    """Metadata + best local body text of one page (no network access).
+
+    ``cheap`` skips Readability (selectors and JSON-LD only), for pages that
+    ran over their time budget (see parsepool.py). ``backend`` picks the HTML
+    parser (see htmlparse.py); if the fast one fails, BeautifulSoup is used.
+    With the domain's learned ``template`` (see boilerplate.py) the selector
+    text is tried first, minus boilerplate, and Readability only runs if it
+    is too short. ``art["paragraphs"]`` holds the keys to learn from.
+    """
+    try:
+        return _extract(html, url, category, selectors, cheap, backend, template)
+    except Exception:
+        if backend == "bs4":
+            raise
+        return _extract(html, url, category, selectors, cheap, "bs4", template)
+
+def _extract(html, url, category, selectors, cheap, backend, template):
+    # Heavy parsers are imported on first use (in the parser workers), not at startup
+    from readability import Document
+    from dateutil import parser as dtparse
+    page = parse_html(html, backend)
+
+    # Canonical & normalized URLs
+    canonical = (page.find("link", rel="canonical") or {}).get("href") or url
+    canonical = normalize_url(canonical)
+    norm_url  = normalize_url(url)
+
+    # Title
+    h1 = page.text("h1")
+    title = h1 if h1 is not None else (page.find("meta", property="og:title") or {}).get("content") or ""
+
+    # Author (BBC often omits)
+    author_meta = page.find("meta", name="byl") or page.find("meta", name="author")
+    author = author_meta.get("content") if author_meta else None
+
+    # Image
+    image = (page.find("meta", property="og:image") or {}).get("content")
+
+    # Tags
+    meta_kw = page.find("meta", name="news_keywords") or page.find("meta", name="keywords")
+    tags_list = [t.strip().lower() for t in (meta_kw.get("content","").split(",")) if t.strip()] if meta_kw else []
+    tags = ", ".join(tags_list) if tags_list else None
+
+    # Published date
+    date_raw = None
+    for tag, attrs, attr in [
+        ("meta", {"property": "article:published_time"}, "content"),
+        ("meta", {"name": "OriginalPublicationDate"}, "content"),
+        ("time", {}, "datetime"),
+    ]:
+        el = page.find(tag, **attrs)
+        if el and el.get(attr):
+            date_raw = el.get(attr); break
+    try:
+        published_date = dtparse.parse(date_raw).isoformat() if date_raw else None
+    except Exception:
+        published_date = None
+
+    # ----- Body extraction: Readability → source selectors → JSON-LD (→ AMP by caller) -----
+    # Source selectors, first one that matches wins
+    paras = []
+    for sel in selectors:
+        paras = page.select(sel)
+        if paras:
+            break
+    selector_text = None
+    # 0) With a learned template the selector text is usually clean already
+    if template is not None and paras:
+        selector_text = page.clean_join(paras, template)
+    content_text = selector_text or ""
+
+    # 1) Readability
+    if not cheap and len(content_text) < MIN_BODY_CHARS:
+        try:
+            content_html = Document(html).summary(html_partial=True)
+            content_text = best_text(content_text, page.fragment_text(content_html))
+        except Exception:
+            pass
+
+    # 2) Source selectors
+    if len(content_text) < MIN_BODY_CHARS and paras:
+        if selector_text is None:
+            selector_text = page.clean_join(paras)
+        content_text = best_text(content_text, selector_text)
+
+    # 3) JSON-LD articleBody
+    if len(content_text) < MIN_BODY_CHARS:
+        for script in page.json_ld():
+            try:
+                data = json.loads(script)
+            except Exception:
+                continue
+            objs = data if isinstance(data, list) else [data]
+            for obj in objs:
+                if isinstance(obj, dict) and obj.get("@type") in ("NewsArticle","Article"):
+                    body = obj.get("articleBody")
+                    if isinstance(body, str) and len(body) > len(content_text):
+                        content_text = body.strip()
+            if len(content_text) >= MIN_BODY_CHARS:
+                break
+
+    return {
+        "title": title,
+        "tags": tags,
+        "content": content_text,
+        "url": canonical or norm_url,   # store canonical when available
+        "category": category,
+        "author": author,
+        "image": image,
+        "published_date": published_date,
+        "amp": (page.find("link", rel="amphtml") or {}).get("href"),
+        "paragraphs": paragraph_keys(page, paras),
+    }
+
+def needs_amp(art):
+    return len(art["content"]) < MIN_BODY_CHARS and bool(art.get("amp"))
+
+AMP_SELECTORS = ("article p", "main p", "p")
+
+def extract_amp(amp_html, backend=DEFAULT_BACKEND):
+    """Body text of an AMP page."""
+    page = parse_html(amp_html, backend)
+    for sel in AMP_SELECTORS:
+        amp_paras = page.select(sel)
+        if amp_paras:
+            return page.clean_join(amp_paras)
+    return ""
+
+def best_text(current, candidate):
+    return candidate if len(candidate) > len(current) else current
+
+def finalize(art, source_name):
+    """Final CSV row (with dedupe keys) or None for thin pages."""
+    content_text = art["content"].strip()
+    if len(content_text) < THIN_BODY_CHARS:
+        return None
+
+    # ----- De-dup keys -----
+    # Prefer canonical URL; fallback to normalized request URL
+    id_article = article_id(art["url"])
+
+    # Content hash catches same story under different URLs
+    content_hash = hashlib.sha1((art["title"] + "|" + content_text[:4000]).encode("utf-8", "ignore")).hexdigest()
+
+    return {
+        "id_article": id_article,
+        "title": art["title"],
+        "tags": art["tags"],
+        "content": content_text,
+        "url": art["url"],
+        "category": art["category"],
+        "source": source_name,
+        "author": art["author"],
+        "image": art["image"],
+        "published_date": art["published_date"],
+        "content_hash": content_hash,
+        "body_hash": body_hash(content_text),   # body store key
+    }
@@ -0,0 +1,173 @@
+# fetcher.py
+"""Shared HTTP layer: one pooled session and a per-host politeness limiter.
+
+Responses are streamed: ``max_bytes`` aborts a download as soon as it grows
+past the cap (or its Content-Length announces it will), and ``types``
+rejects e.g. video/PDF/audio links from the headers alone, before the body
+is read. Either raises ``ResponseRejected``.
+
+The session asks for the best content-encoding urllib3 can decode here
+(zstd and br need their optional packages, gzip/deflate always work), and
+``Bandwidth`` counts wire (compressed) and decoded bytes per host.
+"""
+import os, csv, time, threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+TIMEOUT         = 20
+POOL_SIZE       = 32            # connections kept per host
+ACCEPT_LANGUAGE = "en;q=0.9, fr;q=0.8"
+CHUNK_SIZE      = 64 * 1024
+HTML_TYPES      = ("text/html", "application/xhtml+xml")
+ENCODING_PREFERENCE = ("zstd", "br", "gzip", "deflate")    # best compression first
+
+class ResponseRejected(Exception):
+    """Response not worth reading (too large / unwanted type); retrying will not help."""
+
+class _NotModified(tuple):
+    pass
+
+NOT_MODIFIED = _NotModified()     # page scrape result of a 304: no rows, and not a failure
+
+# ===================== RATE LIMIT =====================
+class RateLimiter:
+    """Spaces requests to the same host by at least ``interval`` seconds.
+
+    Hosts are independent, so parallel workers only ever wait on their own host.
+    """
+
+    def __init__(self, interval=1.2):
+        self.interval = interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def ready(self, url):
+        """True if a request to ``url``'s host would not have to wait."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            return self._next.get(host, 0.0) <= time.monotonic()
+
+    def wait(self, url, interval=None):
+        host = urlparse(url).netloc.lower()
+        gap = self.interval if interval is None else interval
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + gap
+        if slot > now:
+            time.sleep(slot - now)
+
+def page_body(r):
+    """Body for the HTML parsers: text if the headers declare a charset, else the raw
+    bytes, leaving ``<meta charset>`` to the parser (no whole-body charset sniffing)."""
+    if "charset=" in r.headers.get("Content-Type", "").lower():
+        return r.text
+    return r.content
+
+# ===================== BANDWIDTH =====================
+BANDWIDTH_FIELDS = ["requests", "compressed", "wire_bytes", "decoded_bytes"]
+
+class Bandwidth:
+    """Per-host transfer counters for one run."""
+
+    def __init__(self):
+        self.hosts = defaultdict(lambda: dict.fromkeys(BANDWIDTH_FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def record(self, url, wire, decoded, encoding=""):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            h = self.hosts[host]
+            h["requests"] += 1
+            h["compressed"] += bool(encoding and encoding != "identity")
+            h["wire_bytes"] += wire
+            h["decoded_bytes"] += decoded
+
+    def totals(self):
+        with self._lock:
+            return {f: sum(h[f] for h in self.hosts.values()) for f in BANDWIDTH_FIELDS}
+
+    def summary(self):
+        t = self.totals()
+        saved = 1 - t["wire_bytes"] / t["decoded_bytes"] if t["decoded_bytes"] else 0.0
+        return (f"{t['requests']} requests, {t['wire_bytes'] / 2**20:.1f} MiB on the wire, "
+                f"{t['decoded_bytes'] / 2**20:.1f} MiB decoded ({saved:.0%} saved by compression)")
+
+    def save(self, path):
+        """Append this run's per-host counters to the CSV at ``path``."""
+        if not self.hosts:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new = not os.path.exists(path)
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock, open(path, "a", newline="") as f:
+            w = csv.writer(f)
+            if new:
+                w.writerow(["run", "host", *BANDWIDTH_FIELDS])
+            for host, h in sorted(self.hosts.items()):
+                w.writerow([stamp, host, *(h[k] for k in BANDWIDTH_FIELDS)])
+
+# ===================== SESSION =====================
+def accept_encoding():
+    """Accept-Encoding listing what urllib3 can decode in this environment, best first."""
+    from urllib3.util.request import ACCEPT_ENCODING
+    available = {e.strip() for e in ACCEPT_ENCODING.split(",")}
+    return ", ".join(e for e in ENCODING_PREFERENCE if e in available)
+
+def make_session(pool_size=POOL_SIZE):
+    import requests
+    from requests.adapters import HTTPAdapter
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers["Accept-Language"] = ACCEPT_LANGUAGE
+    s.headers["Accept-Encoding"] = accept_encoding()
+    return s
+
+class Fetcher:
+    """Session + limiter shared by every source and worker thread."""
+
+    def __init__(self, session=None, limiter=None, timeout=TIMEOUT):
+        self.session = session or make_session()
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self.bandwidth = Bandwidth()
+
+    def get(self, url, user_agent=None, pause=None, max_bytes=None, types=None, cancel=None, **kw):
+        """GET ``url``; the body is read up to ``max_bytes`` (decoded) and kept on the response.
+
+        ``types`` lists acceptable Content-Type prefixes (a missing header passes).
+        Setting the ``cancel`` event abandons the download between chunks.
+        """
+        self.limiter.wait(url, pause)
+        if cancel is not None and cancel.is_set():
+            raise ResponseRejected("cancelled")
+        headers = kw.pop("headers", {})
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        r = self.session.get(url, headers=headers, timeout=self.timeout, stream=True, **kw)
+        size = 0
+        try:
+            r.raise_for_status()
+            ctype = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if types and ctype and r.status_code != 304 and not ctype.startswith(tuple(types)):
+                raise ResponseRejected(f"content-type {ctype}")
+            length = r.headers.get("Content-Length", "")
+            if max_bytes and length.isdigit() and int(length) > max_bytes:
+                raise ResponseRejected(f"{int(length)} bytes > cap of {max_bytes}")
+            body = []
+            for chunk in r.iter_content(CHUNK_SIZE):
+                if cancel is not None and cancel.is_set():
+                    raise ResponseRejected("cancelled")
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise ResponseRejected(f"over the cap of {max_bytes} bytes")
+                body.append(chunk)
+            r._content = b"".join(body)
+        finally:
+            # raw.tell(): body bytes pulled off the socket, before decompression
+            self.bandwidth.record(url, r.raw.tell(), size, r.headers.get("Content-Encoding", ""))
+            r.close()
+        return r
@@ -0,0 +1,366 @@
+# frontier.py
+"""Persistent priority crawl frontier (SQLite) shared by runs, the daemon and backfills.
+
+Two tables, namespaced by source:
+
+* ``sitemaps`` – sitemap / sitemap-index URLs still to expand (backfill).
+* ``urls``     – article URLs, one row per (url, source), with a priority.
+
+Workers ``lease()`` the highest-priority due URL (together with every source
+that wants it), so the freshest stories are fetched first regardless of feed
+order or batch size. Priority is expressed in seconds of freshness:
+
+    priority = published + 3600 * category_weight - RETRY_PENALTY * attempts
+
+so a weight of 1 is worth one hour of recency. Failed URLs are retried
+after an exponential back-off. Leased URLs are only marked done after their
+rows are flushed, so an interrupted run or backfill resumes where it stopped.
+
+Several processes (``engine.py worker``, on one box or on nodes sharing the
+directory) can drain the same frontier. Leases carry an owner and expire
+after ``LEASE_TIMEOUT`` unless renewed, so a crashed worker's URLs go back to
+the queue. Work is partitioned by host: a worker claims a host when it
+leases one of its URLs and keeps it while it renews, so each site is only
+ever hit by one process and its politeness delay still holds. Live workers
+heartbeat in ``owners``, and none claims more than its fair share of the
+hosts with due work (``ceil(hosts / live workers)``), so a worker that starts
+next to a busy one gets hosts as soon as the busy one's batch ends.
+
+``open_frontier()`` picks the queue backend from a ``scheme://`` prefix;
+``BACKENDS`` is the place to plug in a server-backed queue with the same
+methods. ``sqlite-shared://`` uses a rollback journal instead of WAL, for
+network filesystems where WAL's shared memory does not work.
+"""
+import os, math, time, socket, sqlite3, threading
+from functools import partial
+from urllib.parse import urlparse
+
+DEFAULT_PATH  = "state/frontier.sqlite"
+MAX_ATTEMPTS  = 3
+RETRY_BASE    = 300          # seconds before the first retry, doubled per attempt
+RETRY_PENALTY = 6 * 3600     # priority lost per failed attempt
+WEIGHT_SECONDS = 3600        # freshness equivalent of category weight 1.0
+KEEP_DAYS     = 30           # finished URLs remembered (skip re-fetching) this long
+LEASE_TIMEOUT = 600          # seconds before an unrenewed lease (crashed worker) is taken back
+OWNER_TIMEOUT = 120          # seconds without a heartbeat before a worker stops counting as live
+SHARE_REFRESH = 5.0          # seconds between recomputations of the per-worker host cap
+BUSY_TIMEOUT  = 30           # seconds to wait on another process's write lock
+
+PENDING, INFLIGHT, DONE, FAILED, SKIPPED = "pending", "inflight", "done", "failed", "skipped"
+
+def priority(published=None, weight=0.0, attempts=0, now=None):
+    published = published or (time.time() if now is None else now)
+    return published + WEIGHT_SECONDS * weight - RETRY_PENALTY * attempts
+
+def url_host(url):
+    return urlparse(url).netloc.lower()
+
+class Frontier:
+    def __init__(self, path=DEFAULT_PATH, owner=None, lease_timeout=LEASE_TIMEOUT, wal=True):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_timeout = lease_timeout
+        self._renewed = 0.0
+        self._heartbeat_at = 0.0
+        self._share = (0.0, None)            # (computed at, max hosts this worker may hold)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self.db.create_function("url_host", 1, url_host, deterministic=True)
+        self.db.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sitemaps (
+                url TEXT PRIMARY KEY, source TEXT, status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0, added REAL);
+        """)
+        cols = [r[1] for r in self.db.execute("PRAGMA table_info(urls)")]
+        if cols and "priority" not in cols:
+            self._migrate_v1()
+            cols = [r[1] for r in self.db.execute("PRAGMA table_info(urls)")]
+        if cols and "host" not in cols:
+            self._migrate_v2()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT, source TEXT, category TEXT, lastmod TEXT,
+                priority REAL DEFAULT 0, status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0, not_before REAL DEFAULT 0,
+                leased_at REAL, added REAL, updated REAL, host TEXT, owner TEXT,
+                PRIMARY KEY (url, source));
+            CREATE INDEX IF NOT EXISTS urls_queue ON urls (status, priority DESC);
+            CREATE INDEX IF NOT EXISTS urls_host ON urls (status, host, priority DESC);
+            CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, owner TEXT, expires REAL);
+            CREATE TABLE IF NOT EXISTS owners (owner TEXT PRIMARY KEY, expires REAL);
+        """)
+        # A worker died mid-lease: hand its URLs and hosts out again
+        self.reclaim()
+        with self.lock:
+            self._heartbeat(time.time())
+
+    def _migrate_v1(self):
+        """Backfill frontiers created before priorities existed (url was the key)."""
+        with self.db:
+            self.db.execute("ALTER TABLE urls RENAME TO urls_v1")
+            self.db.execute("DROP INDEX IF EXISTS urls_pending")
+        self.db.executescript("""
+            CREATE TABLE urls (
+                url TEXT, source TEXT, category TEXT, lastmod TEXT,
+                priority REAL DEFAULT 0, status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0, not_before REAL DEFAULT 0,
+                leased_at REAL, added REAL, updated REAL,
+                PRIMARY KEY (url, source));
+            INSERT INTO urls (url, source, category, lastmod, priority, status, attempts, added, updated)
+                SELECT url, source, category, lastmod, added, status, attempts, added, updated FROM urls_v1;
+            DROP TABLE urls_v1;
+        """)
+
+    def _migrate_v2(self):
+        """Add the host / lease-owner columns used by multi-worker leasing."""
+        with self.db:
+            self.db.execute("ALTER TABLE urls ADD COLUMN host TEXT")
+            self.db.execute("ALTER TABLE urls ADD COLUMN owner TEXT")
+            self.db.execute("UPDATE urls SET host=url_host(url)")
+
+    # ----- sitemaps -----
+    def add_sitemaps(self, source, urls):
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO sitemaps (url, source, added) VALUES (?, ?, ?)",
+                [(u, source, time.time()) for u in urls])
+
+    def has_sitemaps(self, source):
+        with self.lock:
+            return self.db.execute(
+                "SELECT 1 FROM sitemaps WHERE source=? LIMIT 1", (source,)).fetchone() is not None
+
+    def pending_sitemaps(self, source):
+        with self.lock:
+            return [u for (u,) in self.db.execute(
+                "SELECT url FROM sitemaps WHERE source=? AND status='pending' AND attempts<? ORDER BY added",
+                (source, MAX_ATTEMPTS))]
+
+    def finish_sitemap(self, source, url, children=(), entries=()):
+        """Record what a sitemap contained and mark it done, atomically.
+
+        ``entries`` are (url, category, lastmod, priority) tuples.
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO sitemaps (url, source, added) VALUES (?, ?, ?)",
+                [(c, source, now) for c in children])
+            self.db.executemany(
+                "INSERT OR IGNORE INTO urls (url, source, category, lastmod, priority, added, updated, host) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(u, source, cat, lastmod, prio, now, now, url_host(u))
+                 for u, cat, lastmod, prio in entries])
+            self.db.execute("UPDATE sitemaps SET status='done' WHERE url=?", (url,))
+
+    def sitemap_failed(self, url):
+        with self.lock, self.db:
+            self.db.execute("UPDATE sitemaps SET attempts=attempts+1 WHERE url=?", (url,))
+
+    # ----- urls -----
+    def push(self, entries):
+        """Queue (url, source, category, priority) entries; returns how many are new.
+
+        URLs already known for that source keep their state; a pending one is
+        bumped if the new priority is higher (e.g. it reappeared in a busier feed).
+        """
+        now = time.time()
+        with self.lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO urls (url, source, category, priority, added, updated, host) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(u, s, c, p, now, now, url_host(u)) for u, s, c, p in entries])
+            new = self.db.total_changes - before
+            self.db.executemany(
+                "UPDATE urls SET priority=? WHERE url=? AND source=? AND status='pending' AND priority<?",
+                [(p, u, s, p) for u, s, c, p in entries])
+        return new
+
+    def lease(self, sources, ready=None, now=None):
+        """Take the best due URL whose host is ``ready``; returns (url, [(source, category)]) or None.
+
+        ``sources`` restricts the sources served; ``ready(url)`` lets the caller
+        skip hosts that are still inside their politeness delay. Candidates are
+        the best due URL of each host, so a busy host with many fresher URLs
+        never hides the others. Hosts claimed by another live worker are
+        skipped; the chosen URL's host is claimed.
+        """
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(sources))
+        with self.lock:
+            self._renew(now)
+            hosts, args = self._hosts_allowed(sources, now)
+            # Bare columns next to MAX() come from the row holding the maximum
+            rows = self.db.execute(
+                f"SELECT url, host, MAX(priority) AS best FROM urls WHERE status='pending' AND not_before<=? "
+                f"AND source IN ({marks}) AND {hosts} GROUP BY host ORDER BY best DESC",
+                (now, *sources, *args)).fetchall()
+            for url, host, _ in rows:
+                if ready is not None and not ready(url):
+                    continue
+                with self.db:
+                    held = self.db.execute("SELECT 1 FROM hosts WHERE host=? AND owner=?",
+                                           (host, self.owner)).fetchone() is not None
+                    # The first write takes the database lock, so the checks below
+                    # cannot race another process leasing the same host or URL
+                    before = self.db.total_changes
+                    self.db.execute(
+                        "INSERT INTO hosts (host, owner, expires) VALUES (?, ?, ?) "
+                        "ON CONFLICT (host) DO UPDATE SET owner=excluded.owner, expires=excluded.expires "
+                        "WHERE hosts.owner=excluded.owner OR hosts.expires<=?",
+                        (host, self.owner, now + self.lease_timeout, now))
+                    if self.db.total_changes == before:
+                        continue                    # another worker got the host first
+                    targets = self.db.execute(
+                        f"SELECT source, category FROM urls WHERE url=? AND status='pending' "
+                        f"AND source IN ({marks}) ORDER BY priority DESC", (url, *sources)).fetchall()
+                    if not targets:
+                        # Leased elsewhere since the scan: don't sit on a host we hold no URL of
+                        if not held:
+                            self.db.execute("DELETE FROM hosts WHERE host=? AND owner=?", (host, self.owner))
+                        continue
+                    self.db.execute(
+                        f"UPDATE urls SET status='inflight', leased_at=?, owner=? WHERE url=? "
+                        f"AND status='pending' AND source IN ({marks})", (now, self.owner, url, *sources))
+                return url, targets
+        return None
+
+    def _heartbeat(self, now):
+        """Mark this worker live (at most every third of ``OWNER_TIMEOUT``)."""
+        if now - self._heartbeat_at < OWNER_TIMEOUT / 3:
+            return
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO owners VALUES (?, ?)", (self.owner, now + OWNER_TIMEOUT))
+        self._heartbeat_at = now
+
+    def _cap(self, sources, now):
+        """Hosts this worker may hold: its share of the hosts with due work among live workers."""
+        at, cap = self._share
+        if cap is None or now - at >= SHARE_REFRESH:
+            marks = ",".join("?" * len(sources))
+            hosts = self.db.execute(
+                f"SELECT COUNT(DISTINCT host) FROM urls WHERE status='pending' AND not_before<=? "
+                f"AND source IN ({marks})", (now, *sources)).fetchone()[0]
+            owners = self.db.execute("SELECT COUNT(*) FROM owners WHERE expires>? AND owner<>?",
+                                     (now, self.owner)).fetchone()[0] + 1
+            cap = max(1, math.ceil(hosts / owners))
+            self._share = (now, cap)
+        return cap
+
+    def _hosts_allowed(self, sources, now):
+        """(SQL condition on ``host``, args): not claimed by another live worker, and only
+        hosts this worker already holds once it holds its share."""
+        held = self.db.execute("SELECT COUNT(*) FROM hosts WHERE owner=?", (self.owner,)).fetchone()[0]
+        full = held >= self._cap(sources, now)
+        return ("host NOT IN (SELECT host FROM hosts WHERE owner<>? AND expires>?) "
+                "AND (? OR host IN (SELECT host FROM hosts WHERE owner=?))"), (self.owner, now, not full, self.owner)
+
+    def _renew(self, now):
+        """Extend this worker's leases (at most every third of the timeout)."""
+        self._heartbeat(now)
+        if now - self._renewed < self.lease_timeout / 3:
+            return
+        with self.db:
+            self.db.execute("UPDATE hosts SET expires=? WHERE owner=?",
+                            (now + self.lease_timeout, self.owner))
+            self.db.execute("UPDATE urls SET leased_at=? WHERE status='inflight' AND owner=?",
+                            (now, self.owner))
+        self._renewed = now
+
+    def reclaim(self, now=None):
+        """Return expired leases (workers that stopped renewing) to the queue."""
+        now = time.time() if now is None else now
+        with self.lock, self.db:
+            self.db.execute("UPDATE urls SET status='pending', owner=NULL "
+                            "WHERE status='inflight' AND leased_at<?", (now - self.lease_timeout,))
+            self.db.execute("DELETE FROM hosts WHERE expires<=?", (now,))
+            self.db.execute("DELETE FROM owners WHERE expires<=?", (now,))
+
+    def release_hosts(self):
+        """Give up this worker's host claims (its leased URLs are all settled)."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM hosts WHERE owner=?", (self.owner,))
+            self._share = (0.0, None)        # workers may have come or gone: recount before leasing again
+
+    def pending(self, sources, now=None):
+        """Number of URLs that are due now for ``sources`` on hosts this worker may take."""
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(sources))
+        with self.lock:
+            self._heartbeat(now)
+            hosts, args = self._hosts_allowed(sources, now)
+            return self.db.execute(
+                f"SELECT COUNT(DISTINCT url) FROM urls WHERE status='pending' AND not_before<=? "
+                f"AND source IN ({marks}) AND {hosts}", (now, *sources, *args)).fetchone()[0]
+
+    def held_elsewhere(self, sources, now=None):
+        """Number of due URLs for ``sources`` on hosts other live workers hold."""
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(sources))
+        with self.lock:
+            return self.db.execute(
+                f"SELECT COUNT(DISTINCT url) FROM urls WHERE status='pending' AND not_before<=? "
+                f"AND source IN ({marks}) AND host IN (SELECT host FROM hosts WHERE owner<>? AND expires>?)",
+                (now, *sources, self.owner, now)).fetchone()[0]
+
+    def mark(self, items, status):
+        """Set the status of leased (url, source) pairs."""
+        with self.lock, self.db:
+            self.db.executemany(
+                "UPDATE urls SET status=?, updated=? WHERE url=? AND source=?",
+                [(status, time.time(), u, s) for u, s in items])
+
+    def release(self, items):
+        """Put leased (url, source) pairs back unfinished (e.g. the run ran out of time)."""
+        self.mark(items, PENDING)
+
+    def retry_later(self, items):
+        """Count a failed attempt: back off, lower the priority, give up after MAX_ATTEMPTS."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                "UPDATE urls SET attempts=attempts+1, updated=?, "
+                "priority=priority-?, not_before=?+?*(1<<attempts), "
+                "status=CASE WHEN attempts+1>=? THEN 'failed' ELSE 'pending' END "
+                "WHERE url=? AND source=?",
+                [(now, RETRY_PENALTY, now, RETRY_BASE, MAX_ATTEMPTS, u, s) for u, s in items])
+
+    def prune(self, keep_days=KEEP_DAYS):
+        """Forget finished URLs older than ``keep_days``."""
+        with self.lock, self.db:
+            self.db.execute(
+                "DELETE FROM urls WHERE status IN ('done','skipped','failed') AND updated<?",
+                (time.time() - keep_days * 86400,))
+
+    def stats(self, source):
+        with self.lock:
+            urls = dict(self.db.execute(
+                "SELECT status, COUNT(*) FROM urls WHERE source=? GROUP BY status", (source,)))
+            maps = dict(self.db.execute(
+                "SELECT status, COUNT(*) FROM sitemaps WHERE source=? GROUP BY status", (source,)))
+        return {"urls": urls, "sitemaps": maps}
+
+    def close(self):
+        self.release_hosts()
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM owners WHERE owner=?", (self.owner,))
+        self.db.close()
+
+# ===================== BACKENDS =====================
+BACKENDS = {
+    "sqlite": Frontier,
+    "sqlite-shared": partial(Frontier, wal=False),
+}
+
+def open_frontier(spec=DEFAULT_PATH, **kw):
+    """Frontier for ``spec``: a plain path (SQLite) or ``<backend>://<location>``."""
+    scheme, sep, location = spec.partition("://")
+    if not sep:
+        return Frontier(spec, **kw)
+    if scheme not in BACKENDS:
+        raise SystemExit(f"unknown queue backend {scheme!r} (known: {', '.join(BACKENDS)})")
+    return BACKENDS[scheme](location, **kw)
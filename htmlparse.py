@@ -0,0 +1,207 @@
+# htmlparse.py
+"""HTML parser backends for ``extract()``: raw lxml (fast) and BeautifulSoup (fallback).
+
+Both expose the few operations extraction needs, with the same results:
+
+    page = parse_html(html, "lxml")
+    page.find("meta", property="og:title")   # attribute dict of the first match, or None
+    page.text("h1")                          # text of the first match, or None
+    page.select("article p")                 # nodes, document order
+    page.clean_join(nodes, template)         # body text of paragraph nodes (minus learned boilerplate)
+    page.node_path(node)                     # "html/body/div.story/p", for boilerplate.py
+    page.json_ld()                           # JSON-LD script bodies
+
+CSS selectors are compiled once per process (``compile_selectors()`` runs
+in each parser worker at startup with every source's selectors): cssselect
+→ XPath for lxml, soupsieve for BeautifulSoup. Text follows BeautifulSoup's
+``get_text(" ", strip=True)``: comments, ``<script>``, ``<style>`` and
+``<template>`` contents are skipped.
+
+    python bench/bench_parse.py --pages bench/pages   # same text from both, and timings
+"""
+import re
+from functools import lru_cache
+
+BACKENDS        = ("lxml", "bs4")
+DEFAULT_BACKEND = "lxml"
+
+NON_TEXT   = {"script", "style", "template"}
+BAD_CLASS  = ("promo", "share", "related", "advert", "cookie")
+BAD_PARENT = {"figure", "figcaption", "aside", "header", "footer", "nav"}
+MULTI_VALUED = {"rel", "class"}      # matched per token, as BeautifulSoup does
+
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+
+def _joined(strings, sep):
+    return sep.join(s for s in (x.strip() for x in strings) if s)
+
+def _step(tag, classes):
+    """One DOM path step: the tag and its first class."""
+    return f"{tag}.{classes[0]}" if classes else tag
+
+# ===================== SELECTORS =====================
+@lru_cache(maxsize=None)
+def _css_lxml(selector):
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(selector, translator="html")
+
+@lru_cache(maxsize=None)
+def _css_bs4(selector):
+    import soupsieve
+    return soupsieve.compile(selector)
+
+def compile_selectors(selectors, backend=DEFAULT_BACKEND):
+    """Compile ``selectors`` for ``backend`` now, instead of on the first page."""
+    compile_one = _css_lxml if backend == "lxml" else _css_bs4
+    for sel in selectors:
+        compile_one(sel)
+
+# ===================== LXML =====================
+def _decode(data):
+    """Bytes → str: <meta charset> if declared, else UTF-8, else cp1252 (as BeautifulSoup guesses)."""
+    m = _CHARSET_RE.search(data[:4096])
+    enc = m.group(1).decode("ascii", "replace") if m else "utf-8"
+    try:
+        return data.decode(enc)
+    except (LookupError, UnicodeDecodeError):
+        pass
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+def _strings(el):
+    """Text nodes under ``el`` in document order, minus comments and script-like elements."""
+    if el.text and el.tag not in NON_TEXT:
+        yield el.text
+    if el.tag in NON_TEXT:
+        return
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+class LxmlPage:
+    def __init__(self, html):
+        from lxml import html as lhtml
+        text = _decode(html) if isinstance(html, bytes) else html
+        parser = lhtml.HTMLParser(encoding="utf-8")
+        self.root = lhtml.document_fromstring(text.encode("utf-8"), parser=parser)
+
+    def _matches(self, el, attrs):
+        for k, v in attrs.items():
+            have = el.get(k)
+            if have is None or (have.split() if k in MULTI_VALUED else [have]).count(v) == 0:
+                return False
+        return True
+
+    def find(self, tag, **attrs):
+        for el in self.root.iter(tag):
+            if self._matches(el, attrs):
+                return dict(el.attrib)
+        return None
+
+    def text(self, tag):
+        for el in self.root.iter(tag):
+            return _joined(_strings(el), "")
+        return None
+
+    def select(self, selector):
+        return _css_lxml(selector)(self.root)
+
+    def node_text(self, el):
+        return _joined(_strings(el), " ")
+
+    def node_path(self, el):
+        chain = [el, *el.iterancestors()]
+        return "/".join(_step(a.tag, (a.get("class") or "").split()) for a in reversed(chain))
+
+    def clean_join(self, paras, template=None):
+        out = []
+        for p in paras:
+            txt = self.node_text(p)
+            if not txt or len(txt) < 3:
+                continue
+            if template is not None and template.matches(txt, self.node_path(p)):
+                continue
+            if any(bad in (p.get("class") or "").lower() for bad in BAD_CLASS):
+                continue
+            if any(anc.tag in BAD_PARENT or any(x in (anc.get("class") or "").lower() for x in BAD_CLASS)
+                   for anc in p.iterancestors()):
+                continue
+            out.append(txt)
+        return "\n\n".join(out).strip()
+
+    def json_ld(self):
+        return [s.text or "" for s in self.root.iter("script") if s.get("type") == "application/ld+json"]
+
+    @staticmethod
+    def fragment_text(html):
+        from lxml import html as lhtml
+        if not html.strip():
+            return ""
+        return _joined(_strings(lhtml.document_fromstring(html)), " ")
+
+# ===================== BEAUTIFULSOUP =====================
+class SoupPage:
+    def __init__(self, html):
+        from bs4 import BeautifulSoup
+        self.soup = BeautifulSoup(html, "lxml")
+
+    def find(self, tag, **attrs):
+        el = self.soup.find(tag, attrs=attrs)
+        return dict(el.attrs) if el is not None else None
+
+    def text(self, tag):
+        el = self.soup.find(tag)
+        return el.get_text(strip=True) if el is not None else None
+
+    def select(self, selector):
+        return _css_bs4(selector).select(self.soup)
+
+    def node_text(self, el):
+        return el.get_text(" ", strip=True)
+
+    def node_path(self, el):
+        chain = [el, *(a for a in el.parents if a.name != "[document]")]
+        return "/".join(_step(a.name, a.get("class", [])) for a in reversed(chain))
+
+    def clean_join(self, paras, template=None):
+        """Join <p> nodes into paragraphs; skip empties, obvious non-body items and ``template`` boilerplate."""
+        out = []
+        for p in paras:
+            txt = p.get_text(" ", strip=True)
+            if not txt or len(txt) < 3:
+                continue
+            if template is not None and template.matches(txt, self.node_path(p)):
+                continue
+            # Skip common non-body containers via class hints
+            cls = " ".join(p.get("class", [])).lower()
+            if any(bad in cls for bad in BAD_CLASS):
+                continue
+            # Skip if inside non-body ancestors
+            bad = False
+            for anc in p.parents:
+                if getattr(anc, "name", None) in BAD_PARENT:
+                    bad = True; break
+                acl = " ".join(anc.get("class", [])).lower() if hasattr(anc, "get") else ""
+                if any(x in acl for x in BAD_CLASS):
+                    bad = True; break
+            if bad:
+                continue
+            out.append(txt)
+        return "\n\n".join(out).strip()
+
+    def json_ld(self):
+        return [s.string or "" for s in self.soup.find_all("script", type="application/ld+json")]
+
+    @staticmethod
+    def fragment_text(html):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "lxml").get_text(" ", strip=True)
+
+PAGES = {"lxml": LxmlPage, "bs4": SoupPage}
+
+def parse_html(html, backend=DEFAULT_BACKEND):
+    return PAGES[backend](html)
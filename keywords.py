@@ -0,0 +1,49 @@
+# keywords.py
+"""Keywords for articles that came without ``news_keywords``/``keywords`` meta tags.
+
+The words of a batch of articles are scored by TF-IDF against the corpus
+document frequencies of textvec.py (kept up to date by every flush, never
+recomputed), and the ``KEYWORDS`` best words of each article become its
+``tags``. The whole batch is scored with a handful of numpy operations, so
+the per-article cost is the tokenizing; the engine runs it in a parser
+worker while flushing, away from the fetch threads.
+
+    tags = keyword_batch(texts, DocFreq("state/textvec.sqlite").idf())
+    # ["tariff, steel, exporters, …", …]
+"""
+import numpy as np
+
+from textvec import tokens, term_id
+
+KEYWORDS     = 8       # words per article
+TITLE_WEIGHT = 2       # title words count this many times
+BATCH_ROWS   = 500     # articles per worker task
+
+def article_text(row):
+    return ((row.get("title") or "") + " ") * TITLE_WEIGHT + (row.get("content") or "")
+
+def keyword_batch(texts, idf, top=KEYWORDS):
+    """``tags`` string ("a, b, c") of every text, "" when it has no content words."""
+    docs = [tokens(t) for t in texts]
+    vocab = {}
+    word_ids = np.fromiter((vocab.setdefault(w, len(vocab)) for ws in docs for w in ws),
+                           dtype=np.int64, count=sum(map(len, docs)))
+    if not len(word_ids):
+        return [""] * len(texts)
+    words = list(vocab)
+    buckets = np.fromiter((term_id(w) for w in words), dtype=np.int64, count=len(words))
+    doc_ids = np.repeat(np.arange(len(docs)), [len(ws) for ws in docs])
+    # (article, word) pairs with their counts, sorted by article
+    pairs, counts = np.unique(doc_ids * len(words) + word_ids, return_counts=True)
+    doc, word = pairs // len(words), pairs % len(words)
+    score = (1.0 + np.log(counts)) * idf[buckets[word]]
+    # Best first within each article, then the rank of each word in its article
+    order = np.lexsort((word, -score, doc))
+    doc, word = doc[order], word[order]
+    starts = np.searchsorted(doc, np.arange(len(docs)))
+    rank = np.arange(len(doc)) - starts[doc]
+    keep = rank < top
+    tags = [[] for _ in docs]
+    for d, w in zip(doc[keep].tolist(), word[keep].tolist()):
+        tags[d].append(words[w])
+    return [", ".join(t) for t in tags]
@@ -0,0 +1,168 @@
+# neardup.py
+"""Near-duplicate detection: MinHash over word shingles + banded LSH index.
+
+The index is a small SQLite file, so it persists across hourly runs and
+lookups only touch the buckets an article hashes into (no full scan):
+
+    idx = NearDupIndex("state/neardup.sqlite", threshold=0.85)
+    sig = idx.signature(body_text)
+    if idx.query(sig, scope="bbc_articles_simple.csv"): ...   # near-dup
+    idx.add(id_article, sig, scope="bbc_articles_simple.csv")
+
+``scope`` namespaces keys so several outputs can share one index file.
+"""
+import os, re, sqlite3, hashlib, unicodedata
+import numpy as np
+from bodystore import read_articles
+
+DEFAULT_THRESHOLD = 0.85
+NUM_PERM          = 128
+SHINGLE_WORDS     = 5
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE  = re.compile(r"\w+", re.UNICODE)
+
+# ===================== FINGERPRINTS =====================
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents/punctuation and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def shingles(text: str, k: int = SHINGLE_WORDS):
+    """Set of k-word shingles of the normalized text (whole text if shorter)."""
+    words = normalize_text(text).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def _permutations(num_perm, seed=1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def minhash(shingle_set, num_perm=NUM_PERM, seed=1):
+    """MinHash signature (uint32[num_perm]) of a shingle set."""
+    a, b = _permutations(num_perm, seed)
+    if not shingle_set:
+        return np.full(num_perm, _MAX_HASH, dtype=np.uint32)
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+         for s in shingle_set),
+        dtype=np.uint64, count=len(shingle_set),
+    )
+    # (a*x + b) mod p for every (permutation, shingle) pair at once
+    with np.errstate(over="ignore"):
+        ph = (np.outer(a, hv) + b[:, None]) % _MERSENNE & _MAX_HASH
+    return ph.min(axis=1).astype(np.uint32)
+
+def jaccard(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+def optimal_bands(threshold, num_perm=NUM_PERM):
+    """(bands, rows) whose LSH S-curve threshold (1/b)^(1/r) is closest to ``threshold``."""
+    best = None
+    for r in range(1, num_perm + 1):
+        if num_perm % r:
+            continue
+        b = num_perm // r
+        err = abs((1.0 / b) ** (1.0 / r) - threshold)
+        if best is None or err < best[0]:
+            best = (err, b, r)
+    return best[1], best[2]
+
+# ===================== INDEX =====================
+class NearDupIndex:
+    """Persistent banded LSH index over MinHash signatures."""
+
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, seed=1):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+            CREATE TABLE IF NOT EXISTS sigs (
+                scope TEXT, key TEXT, sig BLOB, PRIMARY KEY (scope, key));
+            CREATE TABLE IF NOT EXISTS buckets (
+                scope TEXT, band INTEGER, bucket BLOB, key TEXT);
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (scope, band, bucket);
+        """)
+        # Band layout is fixed once data exists; changing it needs a rebuild
+        meta = dict(self.db.execute("SELECT k, v FROM meta"))
+        if meta:
+            self.num_perm, self.seed = int(meta["num_perm"]), int(meta["seed"])
+            self.bands, self.rows = int(meta["bands"]), int(meta["rows"])
+        else:
+            self.num_perm, self.seed = num_perm, seed
+            self.bands, self.rows = optimal_bands(threshold, num_perm)
+            with self.db:
+                self.db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ("num_perm", str(self.num_perm)), ("seed", str(self.seed)),
+                    ("bands", str(self.bands)), ("rows", str(self.rows)),
+                ])
+
+    def signature(self, text):
+        return minhash(shingles(text), self.num_perm, self.seed)
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [(i, sig[i * r:(i + 1) * r].tobytes()) for i in range(self.bands)]
+
+    def query(self, sig, scope=""):
+        """Keys in ``scope`` whose estimated similarity to ``sig`` >= threshold, best first."""
+        candidates = set()
+        for band, bucket in self._band_keys(sig):
+            for (key,) in self.db.execute(
+                "SELECT key FROM buckets WHERE scope=? AND band=? AND bucket=?",
+                (scope, band, bucket),
+            ):
+                candidates.add(key)
+        hits = []
+        for key in candidates:
+            row = self.db.execute(
+                "SELECT sig FROM sigs WHERE scope=? AND key=?", (scope, key)
+            ).fetchone()
+            if row is None:
+                continue
+            sim = jaccard(sig, np.frombuffer(row[0], dtype=np.uint32))
+            if sim >= self.threshold:
+                hits.append((sim, key))
+        return [key for _, key in sorted(hits, reverse=True)]
+
+    def add(self, key, sig, scope=""):
+        with self.db:
+            cur = self.db.execute(
+                "INSERT OR IGNORE INTO sigs VALUES (?, ?, ?)", (scope, key, sig.tobytes())
+            )
+            if cur.rowcount:
+                self.db.executemany(
+                    "INSERT INTO buckets VALUES (?, ?, ?, ?)",
+                    [(scope, band, bucket, key) for band, bucket in self._band_keys(sig)],
+                )
+
+    def count(self, scope=""):
+        return self.db.execute("SELECT COUNT(*) FROM sigs WHERE scope=?", (scope,)).fetchone()[0]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM sigs").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+def seed_from_csv(index, csv_path, store_dir, scope=""):
+    """Index every article already in ``csv_path`` (first run after enabling)."""
+    n = 0
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return n
+    for row in read_articles(csv_path, store_dir):
+        body = row["content"]
+        if row.get("id_article") and body:
+            index.add(row["id_article"], index.signature(body), scope)
+            n += 1
+    return n
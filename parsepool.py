@@ -0,0 +1,132 @@
+# parsepool.py
+"""Parser worker pool with a per-page time budget.
+
+Readability and BeautifulSoup can spend seconds on a huge live blog or
+broken markup. Every extraction runs in a worker process under two limits:
+
+* a CPU-time budget (``EXTRACT_CPU_BUDGET``, ``ITIMER_PROF`` in the worker):
+  when it runs out the page is extracted again the cheap way (selectors and
+  JSON-LD, no Readability) and counted as a ``soft_timeout``;
+* a wall-clock limit (``HARD_TIMEOUT``) for code the timer cannot interrupt
+  (a long C call in lxml): the stuck worker processes are killed, the pool
+  is restarted and the page is skipped (``killed``).
+
+Counters are in ``ParserPool.stats``, so tail latency per article is bounded
+and visible in the run log.
+"""
+import signal, threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from extract import extract, AMP_SELECTORS
+from htmlparse import compile_selectors, BACKENDS
+
+EXTRACT_CPU_BUDGET = 5.0      # CPU seconds per extraction before the cheap fallback
+HARD_TIMEOUT       = 60.0     # wall seconds before the worker is killed
+
+class ExtractionTimeout(BaseException):
+    """CPU budget exhausted (a BaseException so broad ``except Exception`` blocks let it through)."""
+
+def _on_budget(signum, frame):
+    raise ExtractionTimeout()
+
+def _init_worker(selectors=()):
+    # Import the parsers before any budget runs: an import cut short by the
+    # timer would leave half-initialised modules behind in this worker
+    import bs4, readability, dateutil.parser  # noqa: F401
+    for backend in BACKENDS:
+        compile_selectors([*selectors, *AMP_SELECTORS], backend)
+    signal.signal(signal.SIGPROF, _on_budget)
+
+@contextmanager
+def cpu_budget(seconds):
+    """Raise ExtractionTimeout in this (worker) process after ``seconds`` of CPU time."""
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+
+def extract_within(html, url, category, selectors, template=None, budget=EXTRACT_CPU_BUDGET):
+    """``extract()`` under a CPU budget; falls back to the cheap path (``art["timed_out"]``)."""
+    try:
+        with cpu_budget(budget):
+            return extract(html, url, category, selectors, template=template)
+    except ExtractionTimeout:
+        pass
+    with cpu_budget(budget):
+        art = extract(html, url, category, selectors, cheap=True, template=template)
+    art["timed_out"] = True
+    return art
+
+def run_within(fn, *args, budget=EXTRACT_CPU_BUDGET):
+    """``fn(*args)`` under a CPU budget (no fallback)."""
+    with cpu_budget(budget):
+        return fn(*args)
+
+class ParserPool:
+    """Process pool that can be killed and restarted when a task hangs."""
+
+    def __init__(self, workers, hard_timeout=HARD_TIMEOUT, selectors=()):
+        self.workers = workers
+        self.selectors = tuple(selectors)     # compiled once in every worker
+        self.hard_timeout = hard_timeout
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        # One task per worker at a time, so the wall clock only measures parsing
+        self._slots = threading.BoundedSemaphore(workers)
+        self._generation = 0
+        self._pool = self._start()
+
+    def _start(self):
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.selectors,))
+
+    def _restart(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return                          # another thread already restarted it
+            for proc in list((self._pool._processes or {}).values()):
+                proc.kill()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._start()
+            self._generation += 1
+
+    def run(self, fn, *args, **kw):
+        """``fn(*args, **kw)`` in a worker; raises TimeoutError if it had to be killed."""
+        for attempt in (1, 2):
+            with self._slots:
+                generation, pool = self._generation, self._pool
+                fut = pool.submit(fn, *args, **kw)
+                try:
+                    return fut.result(timeout=self.hard_timeout)
+                except FutureTimeout:
+                    self._count("killed")
+                    self._restart(generation)
+                    raise TimeoutError(f"parser killed after {self.hard_timeout:.0f}s")
+                except ExtractionTimeout:
+                    self._count("soft_timeouts")
+                    raise TimeoutError("over the CPU budget")
+                except BrokenProcessPool:
+                    # Lost to another task's restart: run it again once on the new pool
+                    self._restart(generation)
+                    if attempt == 2:
+                        raise
+
+    def extract(self, html, url, category, selectors, template=None):
+        art = self.run(extract_within, html, url, category, selectors, template)
+        if art.pop("timed_out", False):
+            self._count("soft_timeouts")
+            print(f"[slow page] {url}: over {EXTRACT_CPU_BUDGET:.0f}s CPU, used the cheap extractor")
+        return art
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def summary(self):
+        return ", ".join(f"{n} {k.replace('_', ' ')}" for k, n in sorted(self.stats.items()))
+
+    def shutdown(self):
+        self._pool.shutdown()
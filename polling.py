@@ -0,0 +1,125 @@
+# polling.py
+"""Adaptive per-feed polling schedule for daemon mode.
+
+Each feed gets its own interval, derived from how many new entries it has
+been producing (EWMA of new entries per second) and bounded below by the
+publisher's ``<ttl>`` / ``Cache-Control: max-age`` hints. Busy feeds settle
+at a few minutes, quiet ones drift towards ``MAX_INTERVAL``.
+
+State (intervals, validators, recently seen links) is persisted as JSON so a
+restarted daemon resumes with what it learned.
+"""
+import os, re, json, time
+
+MIN_INTERVAL   = 120          # seconds
+MAX_INTERVAL   = 3600
+START_INTERVAL = 600
+TARGET_NEW     = 2.0          # aim for ~2 new entries per poll
+RATE_ALPHA     = 0.3          # EWMA weight of the latest observation
+BACKOFF        = 1.5          # growth factor after an empty poll
+KEEP_LINKS     = 300          # remembered links per feed
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.I)
+
+def cache_hint(headers, ttl_minutes=None):
+    """Lower bound (seconds) suggested by Cache-Control max-age and RSS <ttl>."""
+    hint = 0
+    m = _MAX_AGE_RE.search(headers.get("Cache-Control", "") if headers else "")
+    if m:
+        hint = int(m.group(1))
+    try:
+        hint = max(hint, int(ttl_minutes) * 60) if ttl_minutes else hint
+    except (TypeError, ValueError):
+        pass
+    return hint
+
+class FeedState:
+    """What we know about one feed URL."""
+
+    def __init__(self, url, d=None):
+        d = d or {}
+        self.url           = url
+        self.interval      = d.get("interval", START_INTERVAL)
+        self.next_due      = d.get("next_due", 0.0)
+        self.last_poll     = d.get("last_poll")
+        self.rate          = d.get("rate")            # new entries / second (EWMA)
+        self.etag          = d.get("etag")
+        self.last_modified = d.get("last_modified")
+        self.links         = list(d.get("links", []))
+
+    def to_dict(self):
+        return {k: v for k, v in vars(self).items() if k != "url"}
+
+    def conditional_headers(self):
+        h = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+    def new_links(self, links):
+        """Links not seen in previous polls (order preserved)."""
+        known = set(self.links)
+        return [l for l in links if l not in known]
+
+    def observe(self, n_new, links=(), headers=None, ttl_minutes=None, now=None):
+        """Record a poll result and schedule the next one."""
+        now = time.time() if now is None else now
+        if headers is not None:
+            self.etag = headers.get("ETag") or self.etag
+            self.last_modified = headers.get("Last-Modified") or self.last_modified
+        if links:
+            self.links = (list(links) + [l for l in self.links if l not in set(links)])[:KEEP_LINKS]
+
+        if self.last_poll is not None:
+            elapsed = max(1.0, now - self.last_poll)
+            obs = n_new / elapsed
+            self.rate = obs if self.rate is None else RATE_ALPHA * obs + (1 - RATE_ALPHA) * self.rate
+        self.last_poll = now
+
+        if n_new == 0 or not self.rate:
+            interval = self.interval * BACKOFF
+        else:
+            interval = TARGET_NEW / self.rate
+        interval = max(interval, cache_hint(headers, ttl_minutes))
+        self.interval = min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+        self.next_due = now + self.interval
+
+    def failed(self, now=None):
+        """Back off after an error without touching the learned rate."""
+        now = time.time() if now is None else now
+        self.interval = min(MAX_INTERVAL, self.interval * BACKOFF)
+        self.next_due = now + self.interval
+
+class Schedule:
+    """FeedState for every feed URL, persisted to ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            raw = {}
+        self.feeds = {url: FeedState(url, d) for url, d in raw.items()}
+
+    def get(self, url):
+        if url not in self.feeds:
+            self.feeds[url] = FeedState(url)
+        return self.feeds[url]
+
+    def due(self, urls, now=None):
+        now = time.time() if now is None else now
+        return [u for u in urls if self.get(u).next_due <= now]
+
+    def next_wakeup(self, urls):
+        return min((self.get(u).next_due for u in urls), default=time.time() + MIN_INTERVAL)
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({u: s.to_dict() for u, s in self.feeds.items()}, f)
+        os.replace(tmp, self.path)
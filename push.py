@@ -0,0 +1,255 @@
+# push.py
+"""Push accepted articles to downstream consumers within seconds.
+
+Each new article is written to a durable outbox (SQLite) as soon as the
+engine accepts it, once per target; one delivery thread per target sends
+what is pending, oldest first, and deletes it only after the target took
+it. A target that is down is retried with exponential back-off, and rows
+it has not taken survive restarts, so delivery is at-least-once (a
+consumer can see a row twice; ``id_article`` identifies it). For sockets
+and pipes "taken" means the kernel accepted the bytes.
+
+Targets, by spec (``engine.py run --push SPEC``, repeatable):
+
+    unix:///run/news.sock        NDJSON over a Unix stream socket
+    fifo:///tmp/news.pipe        NDJSON into a named pipe (waits for a reader)
+    https://example.com/hook     NDJSON batches POSTed (Content-Type: application/x-ndjson)
+    spool:///var/spool/news      NDJSON files, moved into place when complete:
+                                 <dir>/<UTC time>-<n>.ndjson every ROTATE_SECONDS / ROTATE_BYTES
+
+Backpressure: when a target has ``MAX_PENDING`` rows waiting, ``write()``
+blocks for up to ``BACKPRESSURE_WAIT`` seconds per row, so the scraper
+slows to the consumer's pace; beyond that the rows wait on disk.
+``Publisher`` has the ``write(src, row)`` / ``close()`` sink interface of
+api.py, so it can be used there as well.
+"""
+import os, json, time, socket, sqlite3, threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from storage import CSV_COLUMNS
+
+DEFAULT_PATH      = "state/outbox.sqlite"
+BATCH_SIZE        = 200       # rows per send
+POLL_SECONDS      = 1.0       # delivery threads wake at least this often
+MAX_PENDING       = 5000      # rows waiting for a target before write() blocks
+BACKPRESSURE_WAIT = 2.0       # longest write() blocks per row
+RETRY_BASE        = 1.0       # first back-off after a failed send, doubled up to RETRY_MAX
+RETRY_MAX         = 60.0
+DRAIN_TIMEOUT     = 10.0      # close() waits this long for pending rows to go out
+SEND_TIMEOUT      = 30.0
+ROTATE_SECONDS    = 5.0       # spool file age before it is moved into place
+ROTATE_BYTES      = 8 * 2**20
+
+def payload(src, row):
+    """One NDJSON line: the CSV columns, the body and the source/output it was accepted for."""
+    # story_id (and keywords for rows without meta tags) are added when the batch is
+    # flushed, after the push
+    data = {col: row.get(col) for col in CSV_COLUMNS if col != "story_id"}
+    data.update(content=row.get("content"), source_name=src.name, output=src.output_csv)
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+# ===================== TARGETS =====================
+class UnixTarget:
+    def __init__(self, path):
+        self.path = path
+        self.sock = None
+
+    def send(self, lines):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(SEND_TIMEOUT)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        self.sock.sendall("".join(lines).encode("utf-8"))
+
+    def idle(self):
+        pass
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class FifoTarget:
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def send(self, lines):
+        if self.fd is None:
+            # Non-blocking open fails (ENXIO) while no reader has the pipe open
+            fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            os.set_blocking(fd, True)
+            self.fd = fd
+        data = "".join(lines).encode("utf-8")
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def idle(self):
+        pass
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class WebhookTarget:
+    def __init__(self, url):
+        import requests
+        self.url = url
+        self.session = requests.Session()
+
+    def send(self, lines):
+        r = self.session.post(self.url, data="".join(lines).encode("utf-8"), timeout=SEND_TIMEOUT,
+                              headers={"Content-Type": "application/x-ndjson"})
+        r.raise_for_status()
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
+
+class SpoolTarget:
+    """Appends to ``current.ndjson.part`` and renames it into place when it is old or big enough."""
+
+    def __init__(self, directory):
+        self.dir = directory
+        self.part = os.path.join(directory, "current.ndjson.part")
+        self.f = None
+        self.opened = 0.0
+        self.n = 0
+        os.makedirs(directory, exist_ok=True)
+        # Left over from a crash: everything in it was acknowledged, publish it
+        if os.path.exists(self.part) and os.path.getsize(self.part):
+            self._rotate()
+
+    def send(self, lines):
+        if self.f is None:
+            self.f = open(self.part, "a", encoding="utf-8")
+            self.opened = time.monotonic()
+        self.f.write("".join(lines))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.idle()
+
+    def idle(self):
+        if self.f is not None and (time.monotonic() - self.opened >= ROTATE_SECONDS
+                                   or self.f.tell() >= ROTATE_BYTES):
+            self._rotate()
+
+    def _rotate(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+        self.n += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        os.replace(self.part, os.path.join(self.dir, f"{stamp}-{os.getpid()}-{self.n}.ndjson"))
+
+    def close(self):
+        if self.f is not None:
+            self._rotate()
+
+TARGETS = {"unix": UnixTarget, "fifo": FifoTarget, "http": WebhookTarget, "https": WebhookTarget,
+           "spool": SpoolTarget}
+
+def open_target(spec):
+    p = urlparse(spec)
+    if p.scheme not in TARGETS:
+        raise SystemExit(f"unknown push target {spec!r} (schemes: {', '.join(sorted(TARGETS))})")
+    if p.scheme in ("http", "https"):
+        return WebhookTarget(spec)
+    return TARGETS[p.scheme](p.netloc + p.path)
+
+# ===================== PUBLISHER =====================
+class Publisher:
+    def __init__(self, specs, path=DEFAULT_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.specs = list(dict.fromkeys(specs))
+        self.targets = {spec: open_target(spec) for spec in self.specs}
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS outbox (seq INTEGER PRIMARY KEY AUTOINCREMENT, target TEXT, line TEXT);
+            CREATE INDEX IF NOT EXISTS outbox_target ON outbox (target, seq);
+        """)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.stop = threading.Event()
+        self.drain_until = 0.0
+        self.pending = {spec: self.db.execute("SELECT COUNT(*) FROM outbox WHERE target=?", (spec,)).fetchone()[0]
+                        for spec in self.specs}
+        self.stats = {spec: {"sent": 0, "failures": 0} for spec in self.specs}
+        self.threads = [threading.Thread(target=self._deliver, args=(spec,), daemon=True) for spec in self.specs]
+        for t in self.threads:
+            t.start()
+
+    def write(self, src, row):
+        """Queue ``row`` for every target (durably); blocks briefly while a target is far behind."""
+        line = payload(src, row)
+        with self.changed:
+            with self.db:
+                self.db.executemany("INSERT INTO outbox (target, line) VALUES (?, ?)",
+                                    [(spec, line) for spec in self.specs])
+            for spec in self.specs:
+                self.pending[spec] += 1
+            self.changed.notify_all()
+            deadline = time.monotonic() + BACKPRESSURE_WAIT
+            while max(self.pending.values(), default=0) > MAX_PENDING and not self.stop.is_set():
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self.changed.wait(left)
+
+    def _deliver(self, spec):
+        target, delay, retry_at = self.targets[spec], RETRY_BASE, 0.0
+        while True:
+            with self.changed:
+                if self.stop.is_set() and (self.pending[spec] == 0 or time.monotonic() >= self.drain_until):
+                    break
+                if self.pending[spec] == 0 or time.monotonic() < retry_at:
+                    self.changed.wait(POLL_SECONDS)
+                batch = self.db.execute("SELECT seq, line FROM outbox WHERE target=? ORDER BY seq LIMIT ?",
+                                        (spec, BATCH_SIZE)).fetchall()
+            if time.monotonic() < retry_at:
+                continue
+            try:
+                if batch:
+                    target.send([line for _, line in batch])
+                target.idle()
+            except Exception as e:
+                self.stats[spec]["failures"] += 1
+                print(f"[push] {spec} -> {e}; retrying in {delay:.0f}s")
+                target.close()
+                retry_at, delay = time.monotonic() + delay, min(delay * 2, RETRY_MAX)
+                continue
+            delay = RETRY_BASE
+            if batch:
+                with self.changed:
+                    with self.db:
+                        self.db.executemany("DELETE FROM outbox WHERE seq=?", [(seq,) for seq, _ in batch])
+                    self.pending[spec] = max(0, self.pending[spec] - len(batch))
+                    self.stats[spec]["sent"] += len(batch)
+                    self.changed.notify_all()
+        target.close()
+
+    def summary(self):
+        return ", ".join(f"{spec}: {s['sent']} sent, {self.pending[spec]} pending"
+                         + (f", {s['failures']} failed sends" if s["failures"] else "")
+                         for spec, s in self.stats.items())
+
+    def close(self, timeout=DRAIN_TIMEOUT):
+        """Deliver what is pending for up to ``timeout`` seconds; the rest waits for the next run."""
+        with self.changed:
+            self.drain_until = time.monotonic() + timeout
+            self.stop.set()
+            self.changed.notify_all()
+        for t in self.threads:
+            t.join(timeout + SEND_TIMEOUT)
+        self.db.close()
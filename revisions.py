@@ -0,0 +1,213 @@
+# revisions.py
+"""Revalidation of recently scraped articles and their edit history.
+
+    python engine.py revalidate --days 2
+
+Articles are edited after publication. Instead of re-downloading everything,
+``revalidate()`` re-requests recent articles with the ``ETag`` /
+``Last-Modified`` validators saved when they were scraped (``Validators``,
+kept in ``state/``). A 304 costs a few hundred bytes; only a 200 is extracted
+again, and only a changed body is recorded.
+
+A new version is stored as a compact delta against the previous one, not as
+a full body: a list of ``[start, end]`` runs copied from the previous text's
+sentences and literal strings for what was inserted. The delta goes to the
+BodyStore (zstd) under its own sha1; the history is a sidecar CSV next to
+the output, ``<output>_revisions.csv``:
+
+    id_article, revision, checked_at, content_hash, base_hash, delta
+
+``body_at()`` rebuilds any revision from the original body plus its deltas.
+"""
+import os, re, csv, json, time, sqlite3, hashlib, threading
+from datetime import datetime, timedelta, timezone
+
+from storage import locked
+from boilerplate import text_key
+
+DEFAULT_DB      = "state/revisions.sqlite"
+REVALIDATE_DAYS = 2
+REVISION_COLUMNS = ["id_article", "revision", "checked_at", "content_hash", "base_hash", "delta"]
+
+# Sentences (or lines) with their trailing whitespace: "".join(tokens) == text
+_TOKEN_RE = re.compile(r"[^.!?\n]*(?:[.!?]+|\n)\s*|[^.!?\n]+\s*")
+
+# ===================== DELTAS =====================
+def tokens(text):
+    return _TOKEN_RE.findall(text)
+
+def make_delta(old, new):
+    """Delta turning ``old`` into ``new``: [[i, j] copy old tokens i:j | "inserted text", ...]."""
+    from difflib import SequenceMatcher
+    a, b = tokens(old), tokens(new)
+    out = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op == "equal":
+            out.append([i1, i2])
+        elif j2 > j1:
+            out.append("".join(b[j1:j2]))
+    return out
+
+def apply_delta(old, delta):
+    a = tokens(old)
+    return "".join("".join(a[op[0]:op[1]]) if isinstance(op, list) else op for op in delta)
+
+# ===================== VALIDATORS =====================
+class Validators:
+    """ETag / Last-Modified per stored article, for conditional re-fetches."""
+
+    def __init__(self, path=DEFAULT_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS validators (
+                output TEXT, id_article TEXT, etag TEXT, last_modified TEXT, checked REAL,
+                PRIMARY KEY (output, id_article));
+        """)
+
+    def headers(self, output, id_article):
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified FROM validators WHERE output=? AND id_article=?",
+                                  (output, id_article)).fetchone()
+        h = {}
+        if row and row[0]:
+            h["If-None-Match"] = row[0]
+        if row and row[1]:
+            h["If-Modified-Since"] = row[1]
+        return h
+
+    def remember(self, items):
+        """Save (output, id_article, etag, last_modified) tuples; empty validators are skipped."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT INTO validators VALUES (?, ?, ?, ?, ?) ON CONFLICT (output, id_article) "
+                "DO UPDATE SET etag=excluded.etag, last_modified=excluded.last_modified, checked=excluded.checked",
+                [(o, i, e, lm, now) for o, i, e, lm in items if e or lm])
+
+    def close(self):
+        self.db.close()
+
+# ===================== HISTORY =====================
+def revisions_path(output_csv):
+    stem, ext = os.path.splitext(output_csv)
+    return f"{stem}_revisions{ext or '.csv'}"
+
+def read_revisions(output_csv):
+    """{id_article: [revision rows, oldest first]} of ``output_csv``."""
+    path = revisions_path(output_csv)
+    out = {}
+    if not os.path.exists(path):
+        return out
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            out.setdefault(r["id_article"], []).append(r)
+    for revs in out.values():
+        revs.sort(key=lambda r: int(r["revision"]))
+    return out
+
+def append_revisions(output_csv, rows):
+    path = revisions_path(output_csv)
+    with locked(path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=REVISION_COLUMNS)
+            if new:
+                w.writeheader()
+            w.writerows(rows)
+
+def body_at(store, row, revs, upto=None):
+    """Body of an output ``row`` after applying ``revs`` (all of them, or the first ``upto``)."""
+    text = store.body(row, None)
+    if text is None:
+        return None
+    for r in revs[:upto]:
+        text = apply_delta(text, json.loads(store.get(r["delta"])))
+    return text
+
+def comparable(text, template=None):
+    """``text`` with whitespace collapsed and paragraphs the domain's template knows as boilerplate dropped."""
+    paras = re.split(r"\n\s*\n", text or "")
+    if template is not None:
+        paras = [p for p in paras if text_key(p) not in template.texts]
+    return " ".join(" ".join(paras).split())
+
+def unchanged(base, new, template=None):
+    """True if ``new`` (a re-fetch's row) has the body ``base``, however either was extracted.
+
+    The body of a page depends on its domain's learned template at the time
+    (with one, selector paragraphs win over Readability), so both of the
+    re-fetch's extractions are tried, and template boilerplate is ignored.
+    """
+    want = comparable(base, template)
+    return any(comparable(text, template) == want
+               for text in (new["content"], new.get("plain_content")) if text)
+
+def recent_rows(csv_path, days):
+    """Rows of ``csv_path`` published within the last ``days`` (undated rows are skipped)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            try:
+                d = datetime.fromisoformat(r.get("published_date") or "")
+            except ValueError:
+                continue
+            if (d if d.tzinfo else d.replace(tzinfo=timezone.utc)) >= cutoff:
+                yield r
+
+# ===================== PASS =====================
+def revalidate(eng, sources, days=REVALIDATE_DAYS):
+    """Re-check recent articles of ``sources``; returns {output_csv: revisions recorded}."""
+    # Not from engine: that module is __main__ when revalidate runs from the CLI
+    from fetcher import NOT_MODIFIED
+    recorded = {}
+    for src in sources:
+        if not os.path.exists(src.output_csv):
+            continue
+        history = read_revisions(src.output_csv)
+        stats = {"304": 0, "same": 0, "revised": 0, "failed": 0}
+
+        def check(row):
+            revs = history.get(row["id_article"], [])
+            headers = eng.validators.headers(src.output_csv, row["id_article"])
+            # Already counted towards the boilerplate templates when it was first scraped
+            results = eng.scrape(row["url"], [(src, row["category"])], headers, learn=False)
+            if results is NOT_MODIFIED:
+                return "304", None
+            if not results:
+                # Fetch failed, page rejected (type, size) or too thin / unextractable now
+                return "failed", None
+            new = results[0][1]
+            eng.validators.remember([(src.output_csv, row["id_article"], new["etag"], new["last_modified"])])
+            latest = revs[-1]["content_hash"] if revs else row["content_hash"]
+            # Whole bodies: content_hash does not see edits after the first 4000 characters
+            base = body_at(eng.store, row, revs)
+            if base is None:
+                return "failed", None
+            if unchanged(base, new, eng.templates.template(row["url"])):
+                return "same", None
+            delta = json.dumps(make_delta(base, new["content"]), ensure_ascii=False, separators=(",", ":"))
+            key = eng.store.put(hashlib.sha1(delta.encode("utf-8")).hexdigest(), delta)
+            return "revised", {
+                "id_article": row["id_article"], "revision": len(revs) + 1,
+                "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "content_hash": new["content_hash"], "base_hash": latest, "delta": key,
+            }
+
+        rows = list(recent_rows(src.output_csv, days))
+        out = []
+        for fut in [eng.io.submit(check, r) for r in rows]:
+            status, rev = fut.result()
+            stats[status] += 1
+            if rev:
+                out.append(rev)
+                print(f"✎ [{src.name}] revision {rev['revision']} of {rev['id_article']}")
+        if out:
+            append_revisions(src.output_csv, out)
+        recorded[src.output_csv] = recorded.get(src.output_csv, 0) + len(out)
+        print(f"[revalidate] {src.name}: {len(rows)} checked, {stats['304']} not modified, "
+              f"{stats['same']} unchanged, {stats['revised']} revised, {stats['failed']} failed")
+    return recorded
@@ -0,0 +1,180 @@
+# seenset.py
+"""Compact membership set for dedupe keys of very large histories.
+
+Hex keys (``id_article`` = 12 hex chars, ``content_hash`` = 40 hex chars) are
+packed into fixed-width uint64 values (8 bytes per key instead of ~100 bytes
+for a Python ``str`` in a ``set``) and kept in a sorted NumPy array saved as
+``.npy``. Loading is a memory-map, so startup cost is independent of the
+history size; lookups are vectorized binary searches, optionally fronted by a
+Bloom filter.
+
+``id_article`` fits in 48 bits and is stored exactly; ``content_hash`` is
+truncated to its first 64 bits (collision odds ~n²/2^65, negligible here).
+
+The cache is tied to the CSV's size and the hash of its last bytes (not the
+mtime, which a fresh checkout changes) and rebuilt from the CSV when stale.
+"""
+import os, csv, sys, json, hashlib
+import numpy as np
+
+DEFAULT_DIR   = "state/seen"
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES  = 7
+STAMP_TAIL    = 64 * 1024     # bytes at the end of the CSV hashed into the cache stamp
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+# ===================== KEYS =====================
+def hex_to_key(h: str) -> int:
+    """Pack a hex key into a uint64 (first 16 hex chars)."""
+    return int(h.strip()[:16], 16)
+
+def keys_array(hex_keys):
+    out = []
+    for h in hex_keys:
+        try:
+            out.append(hex_to_key(h))
+        except (ValueError, AttributeError):
+            continue   # empty / malformed cells in old CSVs
+    return np.unique(np.asarray(out, dtype=np.uint64))
+
+def _mix(x, seed):
+    """splitmix64 finalizer, vectorized (wrapping uint64 arithmetic)."""
+    with np.errstate(over="ignore"):
+        z = x + np.uint64(0x9E3779B97F4A7C15) * np.uint64(seed + 1)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+# ===================== BLOOM =====================
+class BloomFilter:
+    """Bit-array Bloom filter over uint64 keys."""
+
+    def __init__(self, bits, k=BLOOM_HASHES):
+        self.bits = bits                       # np.uint8 array
+        self.m = np.uint64(len(bits) * 8)
+        self.k = k
+
+    @classmethod
+    def build(cls, keys, bits_per_key=BLOOM_BITS_PER_KEY, k=BLOOM_HASHES):
+        nbytes = max(64, (len(keys) * bits_per_key + 7) // 8)
+        bf = cls(np.zeros(nbytes, dtype=np.uint8), k)
+        bf.add(keys)
+        return bf
+
+    def _positions(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        return [_mix(keys, i) % self.m for i in range(self.k)]
+
+    def add(self, keys):
+        for pos in self._positions(keys):
+            np.bitwise_or.at(self.bits, (pos >> np.uint64(3)).astype(np.intp),
+                             (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+
+    def might_contain(self, keys):
+        hit = None
+        for pos in self._positions(keys):
+            bit = (self.bits[(pos >> np.uint64(3)).astype(np.intp)]
+                   >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+            hit = bit.astype(bool) if hit is None else hit & bit.astype(bool)
+        return hit
+
+# ===================== SET =====================
+class SeenSet:
+    """Sorted uint64 key array (+ optional Bloom filter) with a small in-run overlay."""
+
+    def __init__(self, keys=None, bloom=None):
+        self.keys = keys if keys is not None else np.empty(0, dtype=np.uint64)
+        self.bloom = bloom
+        self.pending = set()   # keys added during this run, merged on save()
+
+    def contains_many(self, hex_keys):
+        """Vectorized membership test; returns a bool array."""
+        q = np.asarray([hex_to_key(h) for h in hex_keys], dtype=np.uint64)
+        found = np.zeros(len(q), dtype=bool)
+        if len(self.keys):
+            mask = self.bloom.might_contain(q) if self.bloom is not None else np.ones(len(q), bool)
+            if mask.any():
+                cand = q[mask]
+                pos = np.searchsorted(self.keys, cand)
+                pos[pos == len(self.keys)] = 0
+                found[mask] = self.keys[pos] == cand
+        if self.pending:
+            found |= np.fromiter((int(k) in self.pending for k in q), bool, count=len(q))
+        return found
+
+    def __contains__(self, hex_key):
+        return bool(self.contains_many([hex_key])[0])
+
+    def add(self, hex_key):
+        self.pending.add(hex_to_key(hex_key))
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+    def merged(self):
+        if not self.pending:
+            return self.keys
+        return np.union1d(self.keys, np.fromiter(self.pending, np.uint64, count=len(self.pending)))
+
+# ===================== PERSISTENCE =====================
+def _paths(csv_path, column, seen_dir):
+    base = os.path.join(seen_dir, f"{os.path.basename(csv_path)}.{column}")
+    return base + ".npy", base + ".bloom.npy", base + ".json"
+
+def _csv_stamp(csv_path):
+    """Size plus a hash of the last ``STAMP_TAIL`` bytes.
+
+    Not the mtime: a fresh checkout (the scheduled workflow) gives every
+    CSV a new one, and the cache would be rebuilt on every run.
+    """
+    with open(csv_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        f.seek(max(0, size - STAMP_TAIL))
+        tail = hashlib.sha1(f.read()).hexdigest()
+    return {"size": size, "tail": tail}
+
+def read_column(csv_path, column):
+    """Stream one column out of a CSV with the stdlib reader (no DataFrame)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        if column not in header:
+            return
+        i = header.index(column)
+        for rec in reader:
+            if len(rec) > i:
+                yield rec[i]
+
+def load_seen(csv_path, column="id_article", seen_dir=DEFAULT_DIR, bloom=True):
+    """SeenSet for ``column`` of ``csv_path``, memory-mapped from cache when fresh."""
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return SeenSet()
+    keys_p, bloom_p, meta_p = _paths(csv_path, column, seen_dir)
+    try:
+        with open(meta_p) as f:
+            fresh = json.load(f) == _csv_stamp(csv_path)
+    except (OSError, ValueError):
+        fresh = False
+    if fresh:
+        keys = np.load(keys_p, mmap_mode="r")
+        bf = BloomFilter(np.load(bloom_p, mmap_mode="r")) if bloom and os.path.exists(bloom_p) else None
+        return SeenSet(keys, bf)
+    # Stale or missing: rebuild from the CSV once and cache it
+    keys = keys_array(read_column(csv_path, column))
+    seen = SeenSet(keys, BloomFilter.build(keys) if bloom else None)
+    save_seen(seen, csv_path, column, seen_dir)
+    return seen
+
+def save_seen(seen, csv_path, column="id_article", seen_dir=DEFAULT_DIR):
+    """Persist ``seen`` (including pending keys) stamped with the CSV's current state."""
+    os.makedirs(seen_dir, exist_ok=True)
+    keys_p, bloom_p, meta_p = _paths(csv_path, column, seen_dir)
+    keys = seen.merged()
+    for path, arr in ((keys_p, keys), (bloom_p, BloomFilter.build(keys).bits)):
+        tmp = path + ".tmp.npy"
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+    with open(meta_p + ".tmp", "w") as f:
+        json.dump(_csv_stamp(csv_path), f)
+    os.replace(meta_p + ".tmp", meta_p)
@@ -0,0 +1,138 @@
+# service.py
+"""Local read-only HTTP service over the scraped corpus (``corpus.py`` index).
+
+    python engine.py serve --port 8080
+
+    GET /articles/<id_article>                  one article, body included
+    GET /articles?category=World&source=BBC&since=2025-06-01&until=2025-07-01&limit=50&offset=0
+    GET /articles?story=3f2a9c1b0d4e            every source's article on one event (story_id)
+    GET /changes?cursor=1200&limit=500          rows indexed after a cursor, for incremental sync
+    GET /search?q=trade+deal&source=BBC&since=2025-06-01&limit=20   ranked full-text search
+
+Responses are JSON. Lists carry ``next`` (the query for the following
+page, or null); ``/changes`` also returns ``cursor`` to resume from. Every
+response has an ``ETag``, and a matching ``If-None-Match`` gets an empty
+304, so a poller that is up to date costs one index lookup.
+
+The index follows the output CSVs: before answering, new rows appended
+since the last request (at most every ``SYNC_INTERVAL`` seconds) are read
+from the end of each file.
+"""
+import json, time, hashlib, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from corpus import CorpusIndex, DEFAULT_PATH as CORPUS_DB, MAX_LIMIT
+from bodystore import BodyStore
+
+DEFAULT_PORT  = 8080
+SYNC_INTERVAL = 1.0         # seconds between checks of the CSVs for new rows
+PAGE_SIZE     = 100
+
+class Corpus:
+    """The index plus the CSVs it follows and the body store."""
+
+    def __init__(self, outputs, index_path=CORPUS_DB, store_dir="bodies"):
+        self.outputs = sorted(set(outputs))
+        self.store = BodyStore(store_dir)
+        self.index = CorpusIndex(index_path, self.store)
+        self.lock = threading.Lock()
+        self.synced = 0.0
+
+    def refresh(self):
+        with self.lock:
+            if time.monotonic() - self.synced < SYNC_INTERVAL:
+                return
+            for path in self.outputs:
+                n = self.index.sync(path)
+                if n:
+                    print(f"[serve] indexed {n} rows of {path}")
+            self.synced = time.monotonic()
+
+def _int(params, key, default):
+    try:
+        return max(0, int(params.get(key, [default])[0]))
+    except ValueError:
+        return default
+
+def _limit(params):
+    # The index caps pages at MAX_LIMIT: cap here too, so ``next`` is built from the real page size
+    return min(_int(params, "limit", PAGE_SIZE), MAX_LIMIT)
+
+class Handler(BaseHTTPRequestHandler):
+    corpus = None       # set by serve()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        self.corpus.refresh()
+        idx = self.corpus.index
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:1] == ["articles"] and len(parts) == 2:
+            rows = idx.get(parts[1])
+            if not rows:
+                return self._send(404, {"error": "unknown article"})
+            row = dict(rows[0], content=self.corpus.store.get(rows[0]["body_hash"] or ""))
+            # The body is keyed by its hash: same hash, same response
+            return self._send(200, row, etag=f'"{row["body_hash"]}"')
+        if parts == ["articles"]:
+            limit, offset = _limit(params), _int(params, "offset", 0)
+            filters = {k: params[k][0] for k in ("category", "source", "output", "since", "until", "story") if k in params}
+            rows = idx.query(limit=limit, offset=offset, **filters)
+            more = len(rows) == limit and limit > 0
+            nxt = f"/articles?{urlencode({**filters, 'limit': limit, 'offset': offset + limit})}" if more else None
+            return self._send(200, {"articles": rows, "next": nxt}, etag=self._list_etag(idx))
+        if parts == ["search"]:
+            if not params.get("q"):
+                return self._send(400, {"error": "missing q"})
+            limit, offset = _limit(params), _int(params, "offset", 0)
+            filters = {k: params[k][0] for k in ("category", "source", "output", "since", "until", "story") if k in params}
+            rows = idx.search(params["q"][0], limit=limit, offset=offset, **filters)
+            query = {"q": params["q"][0], **filters, "limit": limit, "offset": offset + limit}
+            nxt = f"/search?{urlencode(query)}" if len(rows) == limit and limit > 0 else None
+            return self._send(200, {"articles": rows, "next": nxt}, etag=self._list_etag(idx))
+        if parts == ["changes"]:
+            cursor, limit = _int(params, "cursor", 0), _limit(params)
+            rows = idx.changes(cursor, limit)
+            last = rows[-1]["seq"] if rows else cursor
+            more = len(rows) == limit and limit > 0
+            nxt = f"/changes?{urlencode({'cursor': last, 'limit': limit})}" if more else None
+            return self._send(200, {"articles": rows, "cursor": last, "next": nxt}, etag=self._list_etag(idx))
+        self._send(404, {"error": "not found"})
+
+    def _list_etag(self, idx):
+        # Rows are only ever added (a CSV whose indexed rows changed is re-indexed under new seqs)
+        return 'W/"' + hashlib.sha1(f"{idx.last_seq()}|{self.path}".encode()).hexdigest()[:16] + '"'
+
+    def _send(self, status, body, etag=None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def serve(outputs, host="127.0.0.1", port=DEFAULT_PORT, index_path=CORPUS_DB, store_dir="bodies"):
+    """Serve ``outputs`` (CSV paths) until interrupted."""
+    corpus = Corpus(outputs, index_path, store_dir)
+    corpus.refresh()
+    handler = type("CorpusHandler", (Handler,), {"corpus": corpus})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"[serve] {len(corpus.outputs)} outputs on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        corpus.index.close()
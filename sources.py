@@ -0,0 +1,78 @@
+# sources.py
+"""Per-source definitions, one JSON file per source in ``sources/``.
+
+    {
+      "output_csv": "bbc_articles_simple.csv",
+      "source": "BBC",                 # value of the `source` column, or
+      "source_from": "domain",         # "domain" (bbc.com) / "domain_base" (Bbc)
+      "user_agent": "...",
+      "feeds": {"Politics": "https://..."},
+      "body_selectors": ["article p", "main p"],
+      "max_per_feed": 60,
+      "pause_seconds": 1.2,
+      "max_page_bytes": 4194304,       # larger article pages are abandoned mid-download
+      "amp_patterns": ["/live/"],      # URLs whose AMP page is fetched speculatively (amp.py)
+      "category_weights": {"World": 2, "Culture": -1},   # hours of freshness
+      "backfill": {"hosts": ["https://www.bbc.com"]}   # optional, see backfill.py
+    }
+
+The file name (without ``.json``) is the source name used on the command line.
+"""
+import os, glob, json
+from urllib.parse import urlparse
+
+DEFAULT_DIR = "sources"
+
+DEFAULT_UA  = "bbc-hourly-scraper/1.0 (+contact@example.com)"
+DEFAULT_SELECTORS = [
+    '[data-component="text-block"] p',
+    "article p",
+    "main p",
+    '[class*="RichTextComponentWrapper"] p',
+]
+MAX_PAGE_BYTES = 4 * 2**20
+
+class Source:
+    """One scraping target: its feeds, output file and extraction tweaks."""
+
+    def __init__(self, name, cfg):
+        self.name          = name
+        self.output_csv    = cfg["output_csv"]
+        self.feeds         = dict(cfg["feeds"])
+        self.label         = cfg.get("source", name)
+        self.source_from   = cfg.get("source_from")
+        self.user_agent    = cfg.get("user_agent", DEFAULT_UA)
+        self.body_selectors = list(cfg.get("body_selectors", DEFAULT_SELECTORS))
+        self.max_per_feed  = int(cfg.get("max_per_feed", 60))
+        self.pause_seconds = float(cfg.get("pause_seconds", 1.2))
+        self.max_page_bytes = int(cfg.get("max_page_bytes", MAX_PAGE_BYTES))
+        self.amp_patterns  = list(cfg.get("amp_patterns", []))
+        self.backfill      = dict(cfg.get("backfill", {}))    # see backfill.py
+        # Scheduling boost per category, in hours of freshness (see frontier.py)
+        self.category_weights = {k: float(v) for k, v in cfg.get("category_weights", {}).items()}
+
+    def source_name(self, url: str) -> str:
+        """Value of the `source` column for an article at ``url``."""
+        if self.source_from == "domain":
+            return urlparse(url).netloc.replace("www.", "")
+        if self.source_from == "domain_base":
+            domain = urlparse(url).netloc.lower().replace("www.", "")
+            return domain.split(".")[0].capitalize()
+        return self.label
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {len(self.feeds)} feeds → {self.output_csv})"
+
+def load_sources(config_dir=DEFAULT_DIR, only=None):
+    """All sources in ``config_dir`` (sorted by name), optionally filtered by name."""
+    out = []
+    for path in sorted(glob.glob(os.path.join(config_dir, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if only and name not in only:
+            continue
+        with open(path, encoding="utf-8") as f:
+            out.append(Source(name, json.load(f)))
+    missing = set(only or ()) - {s.name for s in out}
+    if missing:
+        raise SystemExit(f"unknown source(s): {', '.join(sorted(missing))} (see {config_dir}/)")
+    return out
@@ -0,0 +1,91 @@
+# storage.py
+"""Output CSVs: one per source, bodies kept in the BodyStore.
+
+The scrape path only uses the stdlib ``csv`` module; pandas is imported by
+``export_frame()`` alone, for analytics/export commands.
+"""
+import os, csv, sys, fcntl
+from contextlib import contextmanager
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+# Bodies go to the BodyStore; the CSV only keeps body_hash as the reference.
+# Columns added later go at the end; append_rows() adds them to older files.
+CSV_COLUMNS = [
+    "id_article","title","tags","url","category","source","author","image","published_date","content_hash",
+    "story_id",     # cross-source event cluster (stories.py)
+    "body_hash",    # body store key: sha1 of the whole body (content_hash only covers 4000 chars)
+]
+
+@contextmanager
+def locked(path):
+    """Exclusive advisory lock on ``path + ".lock"`` shared by every writer process."""
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def file_stamp(path):
+    """(size, mtime_ns) of ``path``, or None if it does not exist; changes on every append."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def ensure_csv(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(CSV_COLUMNS)
+
+def read_header(path):
+    """Columns of an existing CSV (files not yet migrated still carry `content`)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None) or CSV_COLUMNS
+
+def upgrade_header(path):
+    """Add the ``CSV_COLUMNS`` an older file lacks (empty for its rows); returns the header.
+
+    Rewrites the file once, atomically. Callers hold ``locked(path)``.
+    """
+    header = read_header(path)
+    missing = [c for c in CSV_COLUMNS if c not in header]
+    if not missing:
+        return header
+    tmp = path + ".tmp"
+    with open(path, newline="", encoding="utf-8") as f, open(tmp, "w", newline="", encoding="utf-8") as out:
+        reader, writer = csv.reader(f), csv.writer(out)
+        next(reader, None)
+        writer.writerow(header + missing)
+        for rec in reader:
+            if rec:
+                writer.writerow(rec + [""] * (len(header) - len(rec) + len(missing)))
+    os.replace(tmp, path)
+    return header + missing
+
+def append_rows(path, rows, store):
+    """Store bodies, then append ``rows`` in the file's own column layout."""
+    from bodystore import body_hash
+    for row in rows:
+        row["body_hash"] = row.get("body_hash") or body_hash(row["content"])
+        store.put(row["body_hash"], row["content"])
+    # Write in the file's own column layout so un-migrated CSVs stay aligned
+    header = upgrade_header(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=header, extrasaction="ignore",
+                                quoting=csv.QUOTE_MINIMAL)
+        writer.writerows(rows)
+
+# ===================== EXPORT =====================
+def export_frame(csv_path, store_dir="bodies", with_content=True):
+    """DataFrame of ``csv_path`` with bodies inlined from the store (imports pandas)."""
+    import pandas as pd
+    from bodystore import read_articles
+    cols = [c for c in read_header(csv_path) if c != "content"]
+    if with_content:
+        cols.append("content")
+    rows = [{c: r[c] if c == "content" else r.get(c) for c in cols}
+            for r in read_articles(csv_path, store_dir)]
+    return pd.DataFrame(rows, columns=cols)
@@ -0,0 +1,206 @@
+# stories.py
+"""Cross-source story clustering: one ``story_id`` per event, across every output.
+
+Each batch of new articles (title + body) is turned into hashed TF-IDF
+vectors (textvec.py) and compared, in one vectorized pass, with every
+article of the last ``STORY_DAYS`` days and with the rest of the batch.
+An article whose best cosine similarity reaches ``STORY_THRESHOLD`` joins
+that article's story; otherwise it starts a new one (``story_id`` = its
+own ``id_article``).
+
+The in-memory index is a term-sorted array of (term, article, weight)
+postings, so a batch costs a ``searchsorted`` per query term plus one
+``bincount``, not a scan of the window. Assignments and vectors are kept
+in ``state/stories.sqlite``; each batch first loads what other processes
+added since, and the window is reloaded from there at startup.
+
+    idx = StoryIndex("state/stories.sqlite", DocFreq("state/textvec.sqlite"))
+    idx.assign([(output_csv, row), ...])    # sets row["story_id"] on each row
+
+``seed_stories()`` clusters the last days of existing outputs, for a
+window that starts out empty (``engine.py stories --seed``).
+"""
+import os, time, sqlite3, threading
+import numpy as np
+
+from textvec import tokens, term_counts, tfidf
+from corpus import to_epoch
+
+STORY_DAYS      = 3       # how far back an article can join an existing story
+STORY_THRESHOLD = 0.35    # cosine similarity of two articles about the same event
+TITLE_WEIGHT    = 3       # title words count this many times
+QUERY_CHUNK     = 256     # articles scored at once (bounds the score matrix)
+
+def _epoch(row):
+    return to_epoch(row.get("published_date")) or time.time()
+
+def postings(vecs, offset=0):
+    """(terms, rows, weights) of sparse vectors, row numbers starting at ``offset``."""
+    if not vecs:
+        return np.zeros(0, np.int32), np.zeros(0, np.int64), np.zeros(0, np.float32)
+    return (np.concatenate([ids for ids, _ in vecs]).astype(np.int32),
+            np.concatenate([np.full(len(ids), offset + i, dtype=np.int64) for i, (ids, _) in enumerate(vecs)]),
+            np.concatenate([w for _, w in vecs]).astype(np.float32))
+
+def scores(vecs, post_terms, post_rows, post_weights, n):
+    """float[len(vecs), n] dot products of ``vecs`` with the ``n`` indexed articles.
+
+    The postings are sorted by term: each query term is a ``searchsorted``
+    range, and all (query, article) products are summed by one ``bincount``.
+    """
+    q_term, q_row, q_w = postings(vecs)
+    lo = np.searchsorted(post_terms, q_term, "left")
+    hits = np.searchsorted(post_terms, q_term, "right") - lo
+    total = int(hits.sum())
+    if not n or not total:
+        return np.zeros((len(vecs), n))
+    which = np.repeat(np.arange(len(q_term)), hits)
+    pos = lo[which] + np.arange(total) - np.repeat(np.cumsum(hits) - hits, hits)
+    keep = post_rows[pos] < n
+    which, pos = which[keep], pos[keep]
+    flat = q_row[which] * n + post_rows[pos]
+    return np.bincount(flat, weights=q_w[which] * post_weights[pos], minlength=len(vecs) * n).reshape(len(vecs), n)
+
+def best_matches(vecs, post_terms, post_rows, post_weights, n):
+    """(best article, similarity) of each vector, ``QUERY_CHUNK`` vectors at a time."""
+    best_j, best_s = np.zeros(len(vecs), dtype=np.int64), np.zeros(len(vecs))
+    if not n:
+        return best_j, best_s
+    for start in range(0, len(vecs), QUERY_CHUNK):
+        sims = scores(vecs[start:start + QUERY_CHUNK], post_terms, post_rows, post_weights, n)
+        best_j[start:start + len(sims)] = sims.argmax(axis=1)
+        best_s[start:start + len(sims)] = sims.max(axis=1)
+    return best_j, best_s
+
+class StoryIndex:
+    def __init__(self, path, docfreq, days=STORY_DAYS, threshold=STORY_THRESHOLD):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.docfreq = docfreq
+        self.days = days
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS articles (
+                output TEXT NOT NULL, id_article TEXT NOT NULL, story_id TEXT NOT NULL,
+                published REAL, terms BLOB, weights BLOB, PRIMARY KEY (output, id_article));
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published);
+            CREATE INDEX IF NOT EXISTS articles_story ON articles (story_id);
+        """)
+        self.stories = []                 # story_id per index row
+        self.published = np.zeros(0)      # epoch per index row
+        self.post_terms = np.zeros(0, dtype=np.int32)    # postings, sorted by term
+        self.post_rows = np.zeros(0, dtype=np.int64)
+        self.post_weights = np.zeros(0, dtype=np.float32)
+        self.last_rowid = 0
+        self._load()
+
+    # ----- index -----
+    def _load(self):
+        """Add rows stored since the last load (by any process) to the in-memory window."""
+        cutoff = time.time() - self.days * 86400
+        rows = self.db.execute(
+            "SELECT rowid, story_id, published, terms, weights FROM articles WHERE rowid>? AND published>=?"
+            " ORDER BY rowid", (self.last_rowid, cutoff)).fetchall()
+        if rows:
+            self.last_rowid = rows[-1][0]
+            self._add([(sid, pub, np.frombuffer(t, dtype=np.int32), np.frombuffer(w, dtype=np.float32))
+                       for _, sid, pub, t, w in rows])
+
+    def _add(self, docs):
+        """Append (story_id, published, term ids, weights) docs to the window and drop expired ones."""
+        terms, rows, weights = postings([(t, w) for _, _, t, w in docs], offset=len(self.stories))
+        stories = self.stories + [sid for sid, _, _, _ in docs]
+        published = np.concatenate([self.published, [pub for _, pub, _, _ in docs]])
+        terms = np.concatenate([self.post_terms, terms])
+        rows = np.concatenate([self.post_rows, rows])
+        weights = np.concatenate([self.post_weights, weights])
+        # Renumber the articles still inside the window
+        live = published >= time.time() - self.days * 86400
+        renumber = np.cumsum(live) - 1
+        keep = live[rows]
+        order = np.argsort(terms[keep], kind="stable")
+        self.post_terms = terms[keep][order]
+        self.post_rows = renumber[rows[keep]][order]
+        self.post_weights = weights[keep][order]
+        self.stories = [sid for sid, ok in zip(stories, live) if ok]
+        self.published = published[live]
+
+    # ----- clustering -----
+    def assign(self, items):
+        """Set ``row["story_id"]`` on every (output, row) of a batch of new articles."""
+        if not items:
+            return
+        rows = [row for _, row in items]
+        counted = [term_counts(tokens(((r["title"] or "") + " ") * TITLE_WEIGHT + (r["content"] or "")))
+                   for r in rows]
+        with self.lock:
+            self._load()
+            self.docfreq.update([ids for ids, _ in counted])
+            idf = self.docfreq.idf()
+            vecs = [tfidf(ids, counts, idf) for ids, counts in counted]
+            past_j, past_s = best_matches(vecs, self.post_terms, self.post_rows, self.post_weights,
+                                          len(self.stories))
+            # Same-event articles that arrived in the same batch
+            batch = postings(vecs)
+            order = np.argsort(batch[0], kind="stable")
+            batch = tuple(a[order] for a in batch)
+            stories = []
+            for i, row in enumerate(rows):
+                best, sid = self.threshold, row["id_article"]
+                if past_s[i] >= best:
+                    best, sid = past_s[i], self.stories[past_j[i]]
+                if i:
+                    sims = scores([vecs[i]], *batch, i)[0]     # articles 0..i-1 of the batch
+                    j = int(sims.argmax())
+                    if sims[j] >= best:
+                        best, sid = sims[j], stories[j]
+                stories.append(sid)
+                row["story_id"] = sid
+            with self.db:
+                for (output, r), sid, (ids, w) in zip(items, stories, vecs):
+                    cur = self.db.execute("INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                                          (output, r["id_article"], sid, _epoch(r), ids.tobytes(), w.tobytes()))
+                    if not cur.rowcount:
+                        # Already clustered (by another process, or an earlier pass): keep its story
+                        r["story_id"] = self.db.execute(
+                            "SELECT story_id FROM articles WHERE output=? AND id_article=?",
+                            (output, r["id_article"])).fetchone()[0]
+            # Picks up the rows just inserted and any other process added meanwhile, each once
+            self._load()
+
+    def known(self, output, id_article):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM articles WHERE output=? AND id_article=?",
+                                   (output, id_article)).fetchone() is not None
+
+    def story(self, story_id):
+        """[(output, id_article, published)] of a story, oldest first."""
+        with self.lock:
+            return self.db.execute("SELECT output, id_article, published FROM articles WHERE story_id=?"
+                                   " ORDER BY published", (story_id,)).fetchall()
+
+    def largest(self, days=1.0, limit=20):
+        """[(story_id, articles, outputs)] of the biggest stories published in the last ``days``."""
+        with self.lock:
+            return self.db.execute(
+                "SELECT story_id, COUNT(*) AS n, COUNT(DISTINCT output) FROM articles WHERE published>=?"
+                " GROUP BY story_id ORDER BY n DESC LIMIT ?", (time.time() - days * 86400, limit)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+def seed_stories(index, outputs, store, days=STORY_DAYS, batch=500):
+    """Cluster the rows of ``outputs`` published in the last ``days`` that have no story yet."""
+    from revisions import recent_rows
+    items = [(path, r) for path in outputs if os.path.exists(path)
+             for r in recent_rows(path, days) if not index.known(path, r["id_article"])]
+    items.sort(key=lambda item: _epoch(item[1]))
+    for start in range(0, len(items), batch):
+        chunk = items[start:start + batch]
+        for _, r in chunk:
+            r["content"] = store.body(r)
+        index.assign(chunk)
+    return len(items)
@@ -0,0 +1,105 @@
+# textvec.py
+"""Hashed TF-IDF vectors, with document frequencies kept up to date incrementally.
+
+Terms are hashed (CRC32) into ``DIM`` buckets, so there is no vocabulary
+to build or store and every process maps a word to the same id. Document
+frequencies live in SQLite (one row per bucket) and are incremented by
+each batch of new articles; nothing is ever recomputed over the corpus.
+
+    df = DocFreq("state/textvec.sqlite")
+    df.update(term_sets)                      # after a batch of new articles
+    vecs = tfidf_batch(texts, df.idf())       # [(term ids, L2-normalized weights)]
+
+Vectors keep their ``TOP_TERMS`` heaviest terms: enough to compare
+articles, small enough to keep days of them in memory.
+"""
+import os, zlib, sqlite3, threading
+import numpy as np
+
+from neardup import normalize_text
+
+DIM       = 1 << 18
+TOP_TERMS = 64
+MIN_LEN   = 3           # shorter words are dropped
+
+STOPWORDS = frozenset("""
+a about after again against all also am an and any are as at be because been before being
+between both but by can could did do does doing down during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no
+nor not now of off on once only or other our out over own said same says she should so some such
+than that the their them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your year years new
+one two first last told people like get got make made many much may might must
+""".split())
+
+def tokens(text):
+    """Content words of ``text``: normalized, no stopwords, no short words or numbers."""
+    return [w for w in normalize_text(text).split()
+            if len(w) >= MIN_LEN and w not in STOPWORDS and not w.isdigit()]
+
+def term_id(word):
+    return zlib.crc32(word.encode("utf-8")) & (DIM - 1)
+
+def term_counts(words):
+    """(unique term ids, counts) of a token list."""
+    ids = np.fromiter((term_id(w) for w in words), dtype=np.int64, count=len(words))
+    return np.unique(ids, return_counts=True)
+
+def tfidf(ids, counts, idf, top=TOP_TERMS):
+    """(ids, weights): sublinear TF x IDF, ``top`` heaviest terms, L2-normalized."""
+    if not len(ids):
+        return ids.astype(np.int32), np.zeros(0, dtype=np.float32)
+    w = (1.0 + np.log(counts)) * idf[ids]
+    if len(w) > top:
+        keep = np.argpartition(w, -top)[-top:]
+        ids, w = ids[keep], w[keep]
+    norm = np.sqrt((w * w).sum()) or 1.0
+    return ids.astype(np.int32), (w / norm).astype(np.float32)
+
+def tfidf_batch(texts, idf, top=TOP_TERMS):
+    return [tfidf(*term_counts(tokens(t)), idf, top) for t in texts]
+
+class DocFreq:
+    """Per-bucket document counts in SQLite, shared by every process."""
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS df (term INTEGER PRIMARY KEY, n INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self._load()
+
+    def _load(self):
+        counts = np.zeros(DIM, dtype=np.int64)
+        rows = np.array(self.db.execute("SELECT term, n FROM df").fetchall(), dtype=np.int64).reshape(-1, 2)
+        counts[rows[:, 0]] = rows[:, 1]
+        docs = self.db.execute("SELECT value FROM meta WHERE key='docs'").fetchone()
+        self.counts, self.docs = counts, docs[0] if docs else 0
+
+    def update(self, term_sets):
+        """Count one document per array of unique term ids, here and in SQLite."""
+        if not term_sets:
+            return
+        ids, n = np.unique(np.concatenate([np.asarray(t, dtype=np.int64) for t in term_sets]),
+                           return_counts=True)
+        with self.lock, self.db:
+            self.db.executemany("INSERT INTO df VALUES (?, ?) ON CONFLICT (term) DO UPDATE SET n = n + excluded.n",
+                                zip(ids.tolist(), n.tolist()))
+            self.db.execute("INSERT INTO meta VALUES ('docs', ?) ON CONFLICT (key) DO UPDATE SET value = value + ?",
+                            (len(term_sets), len(term_sets)))
+            # Other processes' counts are picked up at the next start
+            self.counts[ids] += n
+            self.docs += len(term_sets)
+
+    def idf(self):
+        """Smoothed IDF of every bucket (float32[DIM])."""
+        with self.lock:
+            return (np.log((1.0 + self.docs) / (1.0 + self.counts)) + 1.0).astype(np.float32)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,64 @@
+# urlmap.py
+"""Persistent feed link → final URL → canonical URL map.
+
+Feed links often redirect (http→https, bbc.co.uk→bbc.com, tracking
+redirectors), and the canonical URL, which ``id_article`` is derived from,
+is only known after the page has been downloaded. Once a link has been
+fetched we remember both:
+
+* ``final(link)`` lets later fetches go straight to the redirect target;
+* ``canonical(link)`` lets the engine recognise an article it already
+  stored before downloading it again (a link seen in another feed, a
+  revalidation, a retried URL).
+
+Entries unused for ``KEEP_DAYS`` are pruned.
+"""
+import os, time, sqlite3, threading
+
+DEFAULT_PATH = "state/urlmap.sqlite"
+KEEP_DAYS    = 30
+
+class UrlMap:
+    def __init__(self, path=DEFAULT_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS links (
+                link TEXT PRIMARY KEY, final TEXT, canonical TEXT, updated REAL);
+        """)
+
+    def _get(self, link):
+        with self.lock:
+            return self.db.execute("SELECT final, canonical FROM links WHERE link=?", (link,)).fetchone()
+
+    def final(self, link):
+        """URL ``link`` last redirected to (``link`` itself if unknown)."""
+        row = self._get(link)
+        return row[0] if row and row[0] else link
+
+    def canonical(self, link):
+        row = self._get(link)
+        return row[1] if row else None
+
+    def record(self, items):
+        """Save (link, final_url, canonical_url) triples."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT INTO links VALUES (?, ?, ?, ?) ON CONFLICT (link) DO UPDATE SET "
+                "final=excluded.final, canonical=excluded.canonical, updated=excluded.updated",
+                [(link, final, canonical, now) for link, final, canonical in items])
+
+    def forget(self, link):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM links WHERE link=?", (link,))
+
+    def prune(self, keep_days=KEEP_DAYS):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM links WHERE updated<?", (time.time() - keep_days * 86400,))
+
+    def close(self):
+        self.db.close()